@@ -10,6 +10,7 @@ from dash.dependencies import Input, Output, State
 import src.algo_2_opt
 import src.algo_genetique
 import src.algo_kohonen
+import src.algo_lin_kernighan
 import src.algo_proche_voisin
 import src.test_algo
 import utils.dash_reusable_components as drc
@@ -83,7 +84,9 @@ app.layout = html.Div(
                                                 {'label': 'Genetic algorithm',
                                                     'value': 2},
                                                 {'label': 'Kohonen algorithm',
-                                                    'value': 3}
+                                                    'value': 3},
+                                                {'label': 'Lin-Kernighan',
+                                                    'value': 4}
                                             ],
                                             clearable=False,
                                             searchable=False,
@@ -144,7 +147,7 @@ def update_random_graph(taille_dataset, choix_algo):
     mat_distance = matrice_distance(data)
 
     if choix_algo == 0:
-        chemin_initial, _,= src.algo_proche_voisin.plus_proche_voisin(
+        chemin_initial, _,= src.algo_proche_voisin.plus_proche_voisin_multiple(
             mat_distance)
 
         # Lancement de l'algorithme 2-opt
@@ -156,9 +159,12 @@ def update_random_graph(taille_dataset, choix_algo):
     elif choix_algo == 2:
         # Lancement de l'algorithme génétique
         df_res = src.algo_genetique.main(data, mat_distance)
-    else:
+    elif choix_algo == 3:
         # Lancement de l'algorithme de kohonen
         df_res = src.algo_kohonen.main(data, mat_distance)
+    else:
+        # Lancement de l'algorithme de Lin-Kernighan
+        df_res = src.algo_lin_kernighan.main(data, mat_distance)
 
     # La solution trouvée par l'algo choisi
     solution_figure = affichage(df_res, data)
@@ -67,7 +67,9 @@ def representation_temps_calcul(fichier_csv: str) -> go.Figure:
                           "Algorithme": 'Algorithm'})
 
     newnames = {'2-opt': '2-opt inversion', 'plus_proche_voisin': 'Nearest neighbor search',
-                'genetique': 'Genetic algorithm', 'kohonen': 'Kohonen algorithm'}
+                'genetique': 'Genetic algorithm', 'kohonen': 'Kohonen algorithm',
+                'lin_kernighan': 'Lin-Kernighan', 'hilbert': 'Hilbert curve',
+                'glouton': 'Greedy edge'}
     fig.for_each_trace(lambda t: t.update(name=newnames[t.name],
                                           legendgroup=newnames[t.name],
                                           hovertemplate=t.hovertemplate.replace(
@@ -95,13 +97,16 @@ def representation_resultats(fichier_csv: str) -> go.Figure:
     fig = px.box(data, x="Algorithme", y="Distance", color="Algorithme", template='plotly_white',
                  title="Distance of the path found according to the algorithm", points="all",
                  category_orders={'Algorithme': ['2-opt inversion', 'Nearest neighbor search',
-                                                 'Genetic algorithm', 'Kohonen algorithm']},
+                                                 'Genetic algorithm', 'Kohonen algorithm',
+                                                 'Lin-Kernighan', 'Hilbert curve', 'Greedy edge']},
                  labels={"Nombre de villes": "Number of cities", "Temps de calcul (en s)": "Calculation time (in s)",
                          "Algorithme": 'Algorithm', "Génétique": 'Genetic'}
                  )
 
     newnames = {'2-opt': '2-opt inversion', 'plus_proche_voisin': 'Nearest neighbor search',
-                'genetique': 'Genetic algorithm', 'kohonen': 'Kohonen algorithm'}
+                'genetique': 'Genetic algorithm', 'kohonen': 'Kohonen algorithm',
+                'lin_kernighan': 'Lin-Kernighan', 'hilbert': 'Hilbert curve',
+                'glouton': 'Greedy edge'}
     fig.for_each_trace(lambda t: t.update(name=newnames[t.name],
                                           legendgroup=newnames[t.name],
                                           hovertemplate=t.hovertemplate.replace(
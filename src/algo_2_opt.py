@@ -1,9 +1,11 @@
 import time
+from collections import deque
 
 import numpy as np
 import pandas as pd
 
 from src.distance import distance_trajet
+from src.tour import Tour, creation_tour, inversion_sur_place
 
 
 # En s'inspirant de la documentation wikipedia sur le 2-opt pour résoudre le TSP, nous
@@ -76,7 +78,364 @@ def inversion(liste: list, debut_inversion: int, fin_inversion: int) -> list:
     return nouvelle_liste
 
 
-def deux_opt(itineraire_initial: list[int], matrice_distance: np.ndarray) -> tuple[list[int], float, list[list[int]]]:
+# Gain minimal pour accepter une inversion. Les moteurs sur tableau se fient au gain calculé
+# sans recalculer la distance : le seuil évite de boucler sur des gains nuls arrondis
+EPSILON = 1e-9
+
+# Politiques d'amélioration des moteurs sur tableau :
+# - premiere : on applique la première inversion améliorante trouvée
+# - meilleure : pour chaque première arête, on applique la meilleure inversion tant
+#   qu'elle améliore le trajet
+POLITIQUES = ['premiere', 'meilleure']
+
+# Implémentations du 2-opt disponibles
+# - classique : listes Python, distance recalculée après chaque inversion
+# - sur_place : tableau int32 modifié sur place, gain calculé en O(1)
+# - voisins : comme sur_place mais limité aux voisins candidats avec bits "don't look"
+# - vectorise : gains de toute une ligne (i fixé, tous les j) calculés en une expression
+MOTEURS = ['classique', 'sur_place', 'voisins', 'vectorise']
+
+
+def tableau_en_itineraire(chemin: np.ndarray, ville_depart: int) -> list[int]:
+    """Conversion d'un cycle stocké en tableau en itinéraire
+
+    Parameters
+    ----------
+    chemin : np.ndarray
+        villes du cycle, sans répétition de la ville de départ
+    ville_depart : int
+        ville par laquelle l'itinéraire doit commencer
+
+    Returns
+    -------
+    list[int]
+        itinéraire commençant et finissant par `ville_depart`
+    """
+    itineraire = np.roll(chemin, -int(np.flatnonzero(chemin == ville_depart)[0]))
+    return itineraire.tolist() + [int(ville_depart)]
+
+
+def tolerance_gain(matrice_distance: np.ndarray) -> float:
+    """Tolérance relative sur les gains due à la précision des distances stockées
+
+    En float32, l'erreur d'arrondi d'un gain dépasse largement `EPSILON` : échanger deux
+    villes confondues donne alors un gain positif dans les deux sens et le moteur boucle.
+    Un gain n'est accepté que s'il dépasse `EPSILON + tolerance * longueur retirée`, la
+    longueur retirée étant la somme des arêtes supprimées par le mouvement.
+
+    Parameters
+    ----------
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+
+    Returns
+    -------
+    float
+        nulle pour les distances float64 ou entières, quelques epsilon machine sinon
+    """
+    dtype = np.dtype(getattr(matrice_distance, 'dtype', np.float64))
+    if np.issubdtype(dtype, np.floating) and dtype.itemsize < 8:
+        # Chaque distance et chacune des trois opérations du gain ajoutent une erreur
+        # d'au plus un demi-epsilon relatif à la longueur retirée
+        return 4 * float(np.finfo(dtype).eps)
+    return 0.0
+
+
+def deux_opt_rapide(itineraire_initial: list[int], matrice_distance: np.ndarray, politique: str = 'premiere') -> tuple[list[int], float]:
+    """Recherche de deux arêtes sécantes sur un tableau modifié sur place.
+
+    Même parcours des couples d'arêtes que `deux_opt`, mais le gain calculé en O(1)
+    suffit à accepter une inversion : la distance du trajet n'est jamais recalculée et
+    l'inversion se fait sur place, du côté le plus court du cycle. Avec la politique
+    `meilleure`, les gains d'une première arête avec toutes les autres sont calculés
+    en une expression numpy, comme dans `deux_opt_vectorise`.
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    politique : str (optionnel)
+        politique d'amélioration parmi `POLITIQUES`
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    assert politique in POLITIQUES, print(
+        "Veuillez choisir une politique parmi : {}".format(POLITIQUES))
+
+    start_time = time.time()
+
+    # Cycle sans répétition de la ville de départ et position de chaque ville
+    chemin = np.array(itineraire_initial[:-1], dtype=np.int32)
+    nombre_ville = len(chemin)
+    position = np.empty(nombre_ville, dtype=np.int32)
+    position[chemin] = np.arange(nombre_ville)
+    tolerance = tolerance_gain(matrice_distance)
+
+    amelioration = True
+    while amelioration:
+        amelioration = False
+        if politique == 'meilleure':
+            # Pour chaque première arête (i, i+1), les gains de toutes les secondes
+            # arêtes (j, j+1) sont calculés en une expression numpy, et la meilleure
+            # inversion est appliquée tant qu'elle améliore le trajet
+            for i in range(nombre_ville - 2):
+                while True:
+                    suite = np.append(chemin, chemin[0])
+                    a, b = suite[i], suite[i+1]
+                    fins = np.arange(
+                        i + 2, nombre_ville if i > 0 else nombre_ville - 1)
+                    if len(fins) == 0:
+                        break
+                    c, d = suite[fins], suite[fins+1]
+                    longueurs_retirees = matrice_distance[a, b] + \
+                        matrice_distance[c, d]
+                    gains = longueurs_retirees - \
+                        matrice_distance[a, c] - matrice_distance[b, d]
+                    # Gains diminués de l'erreur d'arrondi possible (cf. `tolerance_gain`)
+                    gains_surs = gains - tolerance * longueurs_retirees
+                    meilleure_fin = gains_surs.argmax()
+                    if gains_surs[meilleure_fin] <= EPSILON:
+                        break
+                    inversion_sur_place(
+                        chemin, position, i+1, int(fins[meilleure_fin]))
+                    amelioration = True
+            continue
+
+        # Copie en liste Python du tableau pour la lecture : l'accès à un élément
+        # y est bien plus rapide. Elle est rafraîchie après chaque inversion
+        suite = chemin.tolist() + chemin[:1].tolist()
+        # On compare les arêtes (i, i+1) et (j, j+1) non adjacentes du cycle
+        for i in range(nombre_ville - 2):
+            # Distances depuis les extrémités de la première arête, relues après
+            # chaque inversion car celle-ci peut les déplacer
+            a, b = suite[i], suite[i+1]
+            distances_a, distances_b = matrice_distance[a], matrice_distance[b]
+            for j in range(i + 2, nombre_ville if i > 0 else nombre_ville - 1):
+                c, d = suite[j], suite[j+1]
+                longueur_retiree = distances_a[b] + matrice_distance[c, d]
+                delta = longueur_retiree - distances_a[c] - distances_b[d]
+                # Seconde comparaison évaluée seulement pour les rares gains positifs
+                if delta > EPSILON and delta > EPSILON + tolerance * longueur_retiree:
+                    inversion_sur_place(chemin, position, i+1, j)
+                    amelioration = True
+                    suite = chemin.tolist() + chemin[:1].tolist()
+                    a, b = suite[i], suite[i+1]
+                    distances_a, distances_b = matrice_distance[a], matrice_distance[b]
+
+    temps_calcul = time.time() - start_time
+    return tableau_en_itineraire(chemin, itineraire_initial[0]), temps_calcul
+
+
+def amelioration_voisins(a: int, tour: Tour, matrice_distance: np.ndarray, liste_voisins: list[list[int]], distances_voisins: list[list[float]], tolerance: float = 0.0) -> tuple[int, ...]:
+    """Recherche et application d'une inversion améliorante depuis la ville a.
+
+    On teste les inversions remplaçant l'arête (a, b), b étant le successeur ou le
+    prédécesseur de a, par l'arête (a, c) vers un voisin c de a.
+
+    Parameters
+    ----------
+    a : int
+        ville examinée
+    tour : Tour
+        cycle courant, modifié sur place (cf. `src.tour`)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, triés par distance croissante
+    distances_voisins : list[list[float]]
+        distances entre chaque ville et ses voisins candidats
+    tolerance : float (optionnel)
+        tolérance relative sur les gains (cf. `tolerance_gain`)
+
+    Returns
+    -------
+    tuple[int, ...]
+        les extrémités des arêtes modifiées, vide si aucune inversion n'a été trouvée
+    """
+    # sens = 1 : arêtes vers les successeurs, sens = -1 : vers les prédécesseurs
+    for sens in (1, -1):
+        voisin_cycle = tour.suivant if sens == 1 else tour.precedent
+        b = voisin_cycle(a)
+        distance_ab = matrice_distance[a, b]
+
+        for c, distance_ac in zip(liste_voisins[a], distances_voisins[a]):
+            if distance_ac >= distance_ab:
+                break
+            d = voisin_cycle(c)
+            if c == b or d == a:
+                continue
+            longueur_retiree = distance_ab + matrice_distance[c, d]
+            delta = longueur_retiree - distance_ac - matrice_distance[b, d]
+            if delta > EPSILON + tolerance * longueur_retiree:
+                # Suppression de (a, b) et (c, d), ajout de (a, c) et (b, d)
+                if sens == 1:
+                    tour.inverser(b, c)
+                else:
+                    tour.inverser(a, d)
+                return a, b, c, d
+
+    return ()
+
+
+def deux_opt_voisins(itineraire_initial: list[int], matrice_distance: np.ndarray, voisins: np.ndarray, structure: str = 'tableau') -> tuple[list[int], float]:
+    """Recherche de deux arêtes sécantes parmi les voisins candidats de chaque ville.
+
+    Pour une ville a et son successeur (ou prédécesseur) b, on ne teste que les
+    inversions créant une arête entre a et l'un de ses k plus proches voisins c. Les
+    voisins étant triés, on s'arrête dès que d(a, c) >= d(a, b) : aucun gain n'est
+    alors possible.
+
+    Les villes à examiner sont gérées par une file (bits "don't look") : au départ
+    toutes les villes y sont, puis seules les extrémités des arêtes modifiées par une
+    inversion y sont remises. Une passe ne revisite donc que le voisinage des
+    derniers changements.
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville, triés par distance croissante
+        (cf. `src.index_spatial.voisins_candidats`)
+    structure : str (optionnel)
+        représentation du cycle parmi `src.tour.STRUCTURES`. La liste à deux niveaux
+        inverse en O(√n) au lieu de O(n) et devient intéressante sur les grandes instances
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    # Cycle sans répétition de la ville de départ
+    tour = creation_tour(itineraire_initial[:-1], structure)
+    nombre_ville = tour.n
+
+    # Listes Python pour un accès rapide dans la boucle
+    liste_voisins = voisins.tolist()
+    distances_voisins = matrice_distance[np.arange(
+        nombre_ville)[:, np.newaxis], voisins].tolist()
+
+    # File des villes à examiner, une ville n'y est présente qu'une fois
+    file = deque(tour.vers_tableau().tolist())
+    dans_file = np.ones(nombre_ville, dtype=bool)
+    tolerance = tolerance_gain(matrice_distance)
+
+    while file:
+        a = file.popleft()
+        dans_file[a] = False
+
+        villes_modifiees = amelioration_voisins(
+            a, tour, matrice_distance, liste_voisins, distances_voisins, tolerance)
+        # Les extrémités des arêtes modifiées sont à réexaminer
+        for ville in villes_modifiees:
+            if not dans_file[ville]:
+                dans_file[ville] = True
+                file.append(ville)
+
+    temps_calcul = time.time() - start_time
+    return tableau_en_itineraire(tour.vers_tableau(), itineraire_initial[0]), temps_calcul
+
+
+def deux_opt_vectorise(itineraire_initial: list[int], matrice_distance: np.ndarray, politique: str = 'premiere') -> tuple[list[int], float]:
+    """Recherche de deux arêtes sécantes en évaluant une ligne entière de gains à la fois.
+
+    Même parcours que `deux_opt` : pour un début d'inversion i fixé, le gain de toutes
+    les fins j est calculé en une seule expression numpy au lieu d'un appel à `gain`
+    par couple. Avec la politique `premiere`, les inversions acceptées et donc le
+    chemin final sont identiques à ceux de `deux_opt`.
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    politique : str (optionnel)
+        politique d'amélioration parmi `POLITIQUES`. Avec `meilleure`, on applique pour
+        chaque i la meilleure fin j tant qu'il en existe une améliorante
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    assert politique in POLITIQUES, print(
+        "Veuillez choisir une politique parmi : {}".format(POLITIQUES))
+
+    start_time = time.time()
+
+    # Stockage du meilleur résultat courant
+    meilleur_chemin = np.array(itineraire_initial, dtype=np.intp)
+    meilleur_distance = distance_trajet(meilleur_chemin, matrice_distance)
+    nombre_ville = len(meilleur_chemin)
+    tolerance = tolerance_gain(matrice_distance)
+
+    amelioration = True
+    while amelioration:
+        amelioration = False
+        for debut_inversion in range(1, nombre_ville - 2):
+            premiere_fin = debut_inversion + 1
+            while premiere_fin < nombre_ville - 1:
+                # Gain de toutes les inversions commençant en debut_inversion
+                fins_inversion = np.arange(premiere_fin, nombre_ville - 1)
+                avant_permutation = meilleur_chemin[debut_inversion-1]
+                debut_permutation = meilleur_chemin[debut_inversion]
+                fin_permutation = meilleur_chemin[fins_inversion]
+                apres_permutation = meilleur_chemin[fins_inversion+1]
+                longueurs_retirees = matrice_distance[avant_permutation, debut_permutation] + \
+                    matrice_distance[fin_permutation, apres_permutation]
+                gains = longueurs_retirees - (
+                    matrice_distance[avant_permutation, fin_permutation] + matrice_distance[debut_permutation, apres_permutation])
+                # Gains diminués de l'erreur d'arrondi possible (cf. `tolerance_gain`)
+                gains_surs = gains - tolerance * longueurs_retirees
+
+                fin_acceptee = None
+                if politique == 'premiere':
+                    # Comme `deux_opt`, on vérifie la distance du nouveau chemin
+                    for fin_inversion in fins_inversion[gains_surs > 0]:
+                        nouveau_chemin = meilleur_chemin.copy()
+                        nouveau_chemin[debut_inversion:fin_inversion +
+                                       1] = nouveau_chemin[fin_inversion:debut_inversion-1:-1]
+                        nouvelle_distance = distance_trajet(
+                            nouveau_chemin, matrice_distance)
+                        if nouvelle_distance < meilleur_distance:
+                            meilleur_chemin = nouveau_chemin
+                            meilleur_distance = nouvelle_distance
+                            fin_acceptee = fin_inversion
+                            break
+                elif gains_surs.max() > EPSILON:
+                    fin_acceptee = fins_inversion[gains_surs.argmax()]
+                    meilleur_chemin[debut_inversion:fin_acceptee +
+                                    1] = meilleur_chemin[fin_acceptee:debut_inversion-1:-1]
+
+                if fin_acceptee is None:
+                    break
+                amelioration = True
+                # Avec `premiere` on reprend après la fin acceptée, avec `meilleure`
+                # on réévalue toute la ligne puisque son début a changé
+                premiere_fin = fin_acceptee + \
+                    1 if politique == 'premiere' else debut_inversion + 1
+
+    temps_calcul = time.time() - start_time
+    return meilleur_chemin.tolist(), temps_calcul
+
+
+def deux_opt(itineraire_initial: list[int], matrice_distance: np.ndarray, voisins: np.ndarray = None) -> tuple[list[int], float, list[list[int]]]:
     """Recherche de deux arêtes sécantes.
 
     Cette fonction implémente l'algorithme 2-opt décrit sur wikipédia.
@@ -88,6 +447,9 @@ def deux_opt(itineraire_initial: list[int], matrice_distance: np.ndarray) -> tup
         sur le temps de calcul.
     matrice_distance : np.ndarray
         matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray (optionnel)
+        listes des voisins candidats de chaque ville (cf. `src.index_spatial`). Si elles
+        sont fournies, on ne teste que les inversions reliant une ville à l'un de ses voisins
 
     Returns
     -------
@@ -106,10 +468,24 @@ def deux_opt(itineraire_initial: list[int], matrice_distance: np.ndarray) -> tup
     meilleur_distance = distance_trajet(meilleur_chemin, matrice_distance)
     nombre_ville = len(meilleur_chemin)
 
+    if voisins is not None:
+        # Position de chaque ville dans le chemin courant
+        position = np.empty(nombre_ville - 1, dtype=np.intp)
+        position[meilleur_chemin[:-1]] = np.arange(nombre_ville - 1)
+
     while amelioration:
         amelioration = False
         for debut_inversion in range(1, nombre_ville - 2):
-            for fin_inversion in range(debut_inversion + 1, nombre_ville - 1):
+            if voisins is None:
+                fins_inversion = range(debut_inversion + 1, nombre_ville - 1)
+            else:
+                # L'inversion relie la ville précédant le début à la ville de fin : on
+                # ne conserve que les fins qui sont des voisins de cette ville
+                fins_inversion = np.sort(
+                    position[voisins[meilleur_chemin[debut_inversion - 1]]])
+                fins_inversion = fins_inversion[(fins_inversion > debut_inversion) & (
+                    fins_inversion < nombre_ville - 1)]
+            for fin_inversion in fins_inversion:
                 # Evaluation du gain de l'inversion
                 if (gain(matrice_distance, meilleur_chemin, debut_inversion, fin_inversion)) > 0:
                     nouveau_chemin = inversion(
@@ -121,12 +497,15 @@ def deux_opt(itineraire_initial: list[int], matrice_distance: np.ndarray) -> tup
                         meilleur_chemin = nouveau_chemin
                         meilleur_distance = nouvelle_distance
                         amelioration = True
+                        if voisins is not None:
+                            position[meilleur_chemin[debut_inversion:fin_inversion+1]] = np.arange(
+                                debut_inversion, fin_inversion+1)
 
     temps_calcul = time.time() - start_time
     return meilleur_chemin, temps_calcul
 
 
-def main(matrice_distance: np.ndarray, chemin_initial: list, nom_dataset="") -> tuple[pd.DataFrame, list[list[int]]]:
+def main(matrice_distance: np.ndarray, chemin_initial: list, nom_dataset="", voisins: np.ndarray = None, moteur: str = 'classique', politique: str = 'premiere', structure: str = 'tableau') -> tuple[pd.DataFrame, list[list[int]]]:
     """Lancement de l'algorithme de recherche
 
     Parameters
@@ -137,6 +516,14 @@ def main(matrice_distance: np.ndarray, chemin_initial: list, nom_dataset="") ->
         matrice stockant l'integralité des distances inter villes
     nom_dataset : str (optionnel)
         nom du dataset à traiter
+    voisins : np.ndarray (optionnel)
+        listes des voisins candidats de chaque ville
+    moteur : str (optionnel)
+        implémentation du 2-opt à utiliser parmi `MOTEURS`
+    politique : str (optionnel)
+        politique d'amélioration des moteurs sur tableau parmi `POLITIQUES`
+    structure : str (optionnel)
+        représentation du cycle du moteur `voisins` parmi `src.tour.STRUCTURES`
 
     Returns
     -------
@@ -144,9 +531,24 @@ def main(matrice_distance: np.ndarray, chemin_initial: list, nom_dataset="") ->
         variable stockant un ensemble de variables importantes pour analyser
         l'algorithme
     """
+    assert moteur in MOTEURS, print(
+        "Veuillez choisir un moteur parmi : {}".format(MOTEURS))
+
     # Résolution du TSP
-    itineraire, temps_calcul = deux_opt(
-        chemin_initial, matrice_distance)
+    if moteur == 'classique':
+        itineraire, temps_calcul = deux_opt(
+            chemin_initial, matrice_distance, voisins)
+    elif moteur == 'vectorise':
+        itineraire, temps_calcul = deux_opt_vectorise(
+            chemin_initial, matrice_distance, politique)
+    elif moteur == 'voisins':
+        assert voisins is not None, print(
+            "Le moteur 'voisins' nécessite les listes de voisins candidats")
+        itineraire, temps_calcul = deux_opt_voisins(
+            chemin_initial, matrice_distance, voisins, structure)
+    else:
+        itineraire, temps_calcul = deux_opt_rapide(
+            chemin_initial, matrice_distance, politique)
 
     # Calcul de la distance du trajet final trouvé par l'algorithme
     distance_chemin_sub_optimal = distance_trajet(itineraire, matrice_distance)
@@ -1,11 +1,15 @@
-import copy
-import random
+import hashlib
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
 
-from src.distance import distance_trajet
+from src.algo_or_opt import LONGUEUR_OR_OPT, recherche_segments
+from src.cache_distance import ouverture_partagee, source_partagee
+from src.distance import distance_trajet, distances_trajets
+from src.index_spatial import construction_index, voisins_candidats
 
 # En s'inspirant des cours dispensés à l'ENSC en apprentissage automatique j'ai essayé
 # de mettre en place la résolution du TSP via une évolution aléatoire de population.
@@ -22,8 +26,11 @@ POURCENTAGE_MUTATION = 50/100
 # Constante permettant d'arrêter la convergence de l'algorithme
 NOMBRE_EPOCH = 100
 
+# Arrêt anticipé après ce nombre d'epoch sans amélioration du meilleur trajet
+PATIENCE = 20
 
-def init_population(nombre_de_trajet: int, data: pd.DataFrame, matrice_distance: np.ndarray) -> list[dict]:
+
+def init_population(nombre_de_trajet: int, data: pd.DataFrame, matrice_distance: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
     """Initialisation de la population initiale
 
     Construction d'une population initiale de N solutions.
@@ -40,86 +47,50 @@ def init_population(nombre_de_trajet: int, data: pd.DataFrame, matrice_distance:
 
     Returns
     -------
-    list[dict]
-        l'ensemble des N trajets distincts crées avec dans le dictionnaire l'information sur
-        le chemin `Villes` et la distance `Distance`
-    """
-    # Liste stockant la population initiale
-    trajets = []
-    for i in range(nombre_de_trajet):
-        # Initialisation de la forme d'une solution. On instancie un nouveau dictionnaire
-        # à chaque fois pour éviter les problématiques du type référence
-        trajet = {"Villes": [], 'Distance': 0}
-        # Génération d'un ordre de parcours des villes de manière aléatoire
-        trajet['Villes'] = random.sample(
-            range(0, data.shape[0]), data.shape[0])
-        # Le marchand revient sur ses pas donc ajout de la première ville à la fin
-        # de la liste
-        trajet['Villes'].append(trajet['Villes'][0])
-        # Calcul de la distance totale du parcours
-        trajet = evaluation(trajet, matrice_distance)
-        trajets.append(trajet)
-    return trajets
-
-
-def individus_ordonnes(trajets: list[dict]) -> list[dict]:
-    """Tri des trajets par ordre croissant de leur distance
-
-    Parameters
-    ----------
-    trajets : list[dict]
-        listes de toute la population de solutions
-
-    Returns
-    -------
-    list[dict]
-        l'ensemble des N trajets triés
+    villes : np.ndarray
+        tableau int32 N x (n+1), une ligne par trajet
+    distances : np.ndarray
+        distance de chaque trajet
     """
-    return sorted(trajets, key=lambda x: x['Distance'])
+    # Génération d'un ordre de parcours des villes de manière aléatoire, toutes les
+    # permutations en une fois
+    villes = np.argsort(np.random.rand(
+        nombre_de_trajet, data.shape[0]), axis=1).astype(np.int32)
+    # Le marchand revient sur ses pas donc ajout de la première ville à la fin
+    # de chaque trajet
+    villes = np.hstack((villes, villes[:, :1]))
+    return villes, evaluation(villes, matrice_distance)
 
 
-def selection(trajets: list[dict], pourcentage: float) -> list[dict]:
+def selection(villes: np.ndarray, distances: np.ndarray, pourcentage: float) -> tuple[np.ndarray, np.ndarray]:
     """Sélection des N meilleurs
 
     Parmi la population totale on ne conserve qu'un petit pourcentage
-    de la population
+    de la population. `argpartition` isole les N meilleurs sans trier toute la population,
+    seuls ces N trajets sont ensuite triés.
 
     Parameters
     ----------
-    trajets : list[dict]
-        ordre de parcours des villes et distance du trajet
+    villes : np.ndarray
+        population, une ligne par trajet
+    distances : np.ndarray
+        distance de chaque trajet
     pourcentage : int
         le pourcentage à garder de la population initiale
 
     Returns
     -------
-    list[dict]
-        les N meilleurs de la population initiale
+    villes : np.ndarray
+        les N meilleurs de la population initiale, du meilleur au moins bon
+    distances : np.ndarray
+        leur distance
     """
     # Nombre de trajet après sélection
-    nombre_selectionne = int(len(trajets)*pourcentage)
-    # Récupération de ces n trajets dans la liste ordonnées
-    trajets = trajets[:nombre_selectionne]
-    return trajets
-
-
-def probabilite(pourcentage: float) -> bool:
-    """Tirage aléatoire simulant une probabilité de succés
-
-    Parameters
-    ----------
-    pourcentage : float
-        le pourcentage de succés
-
-    Returns
-    -------
-    bool
-        résultat
-    """
-    r = random.randint(0, 100)
-    if r <= pourcentage:
-        return True
-    return False
+    nombre_selectionne = max(1, int(len(villes)*pourcentage))
+    meilleurs = np.argpartition(distances, nombre_selectionne - 1)[
+        :nombre_selectionne]
+    meilleurs = meilleurs[np.argsort(distances[meilleurs])]
+    return villes[meilleurs], distances[meilleurs]
 
 
 # Pour les mutations il est important de conserver l'intégrité de nos trajets. Le point initial est confondu
@@ -147,36 +118,531 @@ def cadre_mutation(nombre_villes: int) -> list[int]:
     return villes_mutables
 
 
-def mutation_aleatoire(trajet: dict) -> dict:
-    """Définition d'une mutation d'un individu
+# Mutations disponibles :
+# - echange : permutation de deux villes
+# - inversion : parcours en sens inverse d'une portion du trajet
+# Chacune ne modifie que quelques arêtes : la variation de distance est calculée en O(1)
+# par trajet au lieu de réévaluer tout le trajet
+MUTATIONS = ['echange', 'inversion']
+
 
-    Cette mutation est une permutation aléatoire de deux villes
+def mutation_aleatoire(villes: np.ndarray, matrice_distance: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Définition d'une mutation de chaque individu
+
+    Cette mutation est une permutation aléatoire de deux villes, tirées pour tous les
+    trajets en une fois. Seules les arêtes touchant les deux villes changent.
 
     Parameters
     ----------
-    trajet : dict
-        ordre de parcours des villes et distance du trajet
+    villes : np.ndarray
+        trajets à muter, une ligne par trajet. Modifiés sur place
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
 
     Returns
     -------
-    dict
-        nouvel ordre de parcours des villes après mutation
+    villes : np.ndarray
+        les trajets après mutation
+    delta : np.ndarray
+        variation de la distance de chaque trajet
     """
-    # Création d'un nouveau dictionnaire pour stocker le trajet muté
-    enfant = {'Villes': [], 'Distance': 0}
-    villes_mutables = cadre_mutation(len(trajet['Villes']))
-    # On ne veux pas modifier le trajet initial. Comme c'est un type référence
-    # on réalise une copie particulière pour ne pas pointer vers la même adresse mémoire
-    enfant['Villes'] = copy.deepcopy(trajet['Villes'])
-    # Indice des éléments à permuter
-    r = random.sample(range(villes_mutables[0], villes_mutables[1]), 2)
+    villes_mutables = cadre_mutation(villes.shape[1])
+    trajets = np.arange(len(villes))
+    # Indice des éléments à permuter, deux indices distincts par trajet avec i < j
+    i = np.random.randint(villes_mutables[0], villes_mutables[1], len(villes))
+    j = np.random.randint(
+        villes_mutables[0], villes_mutables[1] - 1, len(villes))
+    j += j >= i
+    i, j = np.minimum(i, j), np.maximum(i, j)
+
+    # Villes autour des deux villes permutées
+    avant_i, ville_i, apres_i = villes[trajets, i -
+                                       1], villes[trajets, i], villes[trajets, i+1]
+    avant_j, ville_j, apres_j = villes[trajets, j -
+                                       1], villes[trajets, j], villes[trajets, j+1]
+    # Villes non voisines : les quatre arêtes autour de i et de j changent
+    delta = matrice_distance[avant_i, ville_j] + matrice_distance[ville_j, apres_i] + \
+        matrice_distance[avant_j, ville_i] + matrice_distance[ville_i, apres_j] - \
+        matrice_distance[avant_i, ville_i] - matrice_distance[ville_i, apres_i] - \
+        matrice_distance[avant_j, ville_j] - matrice_distance[ville_j, apres_j]
+    # Villes voisines : l'arête entre elles est conservée
+    voisines = j == i + 1
+    delta_voisines = matrice_distance[avant_i, ville_j] + matrice_distance[ville_i, apres_j] - \
+        matrice_distance[avant_i, ville_i] - matrice_distance[ville_j, apres_j]
+    delta = np.where(voisines, delta_voisines, delta)
+
     # Permutation des deux éléments
-    enfant['Villes'][r[0]], enfant['Villes'][r[1]
-                                             ] = enfant['Villes'][r[1]], enfant['Villes'][r[0]]
+    villes[trajets, i], villes[trajets, j] = ville_j, ville_i
+    return villes, delta
+
+
+def mutation_inversion(villes: np.ndarray, matrice_distance: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Définition d'une mutation de chaque individu par inversion
+
+    Une portion du trajet tirée au hasard est parcourue en sens inverse : seules les
+    deux arêtes à ses extrémités changent.
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        trajets à muter, une ligne par trajet. Modifiés sur place
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+
+    Returns
+    -------
+    villes : np.ndarray
+        les trajets après mutation
+    delta : np.ndarray
+        variation de la distance de chaque trajet
+    """
+    nombre_trajets, nombre_colonnes = villes.shape
+    trajets = np.arange(nombre_trajets)
+    # Portion [i, j] ne touchant pas la ville de départ, répétée en fin de trajet
+    bornes = np.sort(np.random.randint(
+        1, nombre_colonnes - 1, (nombre_trajets, 2)), axis=1)
+    i, j = bornes[:, 0], bornes[:, 1]
+
+    delta = matrice_distance[villes[trajets, i-1], villes[trajets, j]] + \
+        matrice_distance[villes[trajets, i], villes[trajets, j+1]] - \
+        matrice_distance[villes[trajets, i-1], villes[trajets, i]] - \
+        matrice_distance[villes[trajets, j], villes[trajets, j+1]]
+
+    # Inversion de toutes les portions en une fois : la colonne k de la portion reçoit
+    # la ville de la colonne i + j - k
+    colonnes = np.arange(nombre_colonnes)
+    portion = (colonnes >= i[:, np.newaxis]) & (colonnes <= j[:, np.newaxis])
+    source = np.where(portion, (i + j)[:, np.newaxis] - colonnes, colonnes)
+    villes[:] = villes[trajets[:, np.newaxis], source]
+    return villes, delta
+
+
+def mutation(villes: np.ndarray, methode: str, matrice_distance: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Mutation de chaque individu selon la méthode choisie
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        trajets à muter, une ligne par trajet. Modifiés sur place
+    methode : str
+        mutation parmi `MUTATIONS`
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+
+    Returns
+    -------
+    villes : np.ndarray
+        les trajets après mutation
+    delta : np.ndarray
+        variation de la distance de chaque trajet
+    """
+    if methode == 'inversion':
+        return mutation_inversion(villes, matrice_distance)
+    return mutation_aleatoire(villes, matrice_distance)
+
+
+# Croisements disponibles :
+# - aucun : les enfants sont des copies mutées des trajets sélectionnés
+# - ox : croisement ordonné (order crossover)
+# - pmx : croisement par correspondance partielle (partially mapped crossover)
+# - eax : croisement par assemblage d'arêtes simplifié (edge assembly crossover)
+# Cf. https://en.wikipedia.org/wiki/Crossover_(genetic_algorithm)
+CROISEMENTS = ['aucun', 'ox', 'pmx', 'eax']
+
+
+def points_coupure(nombre_enfants: int, nombre_villes: int) -> tuple[np.ndarray, np.ndarray]:
+    """Tirage d'un segment [debut, fin[ non vide pour chaque enfant
+
+    Parameters
+    ----------
+    nombre_enfants : int
+        nombre de segments à tirer
+    nombre_villes : int
+        nombre de villes des trajets
+
+    Returns
+    -------
+    debut : np.ndarray
+        première position de chaque segment
+    fin : np.ndarray
+        position suivant la dernière position de chaque segment
+    """
+    bornes = np.sort(np.random.randint(
+        0, nombre_villes, (nombre_enfants, 2)), axis=1)
+    return bornes[:, 0], bornes[:, 1] + 1
+
+
+def croisement_ox(parents_1: np.ndarray, parents_2: np.ndarray) -> np.ndarray:
+    """Croisement ordonné (OX) de chaque couple de parents
+
+    L'enfant reçoit un segment du premier parent à la même place. Les autres villes
+    sont placées à partir de la fin du segment dans l'ordre où elles apparaissent dans
+    le second parent, lui aussi parcouru à partir de la fin du segment.
+
+    Parameters
+    ----------
+    parents_1 : np.ndarray
+        premiers parents, une permutation des villes par ligne (sans retour au départ)
+    parents_2 : np.ndarray
+        seconds parents
+
+    Returns
+    -------
+    np.ndarray
+        les enfants, une permutation par ligne
+    """
+    nombre_enfants, nombre_villes = parents_1.shape
+    lignes = np.arange(nombre_enfants)[:, np.newaxis]
+    debut, fin = points_coupure(nombre_enfants, nombre_villes)
+    colonnes = np.arange(nombre_villes)
+
+    # Villes du segment de chaque premier parent
+    dans_segment = np.zeros((nombre_enfants, nombre_villes), dtype=bool)
+    position_segment = (colonnes >= debut[:, np.newaxis]) & (
+        colonnes < fin[:, np.newaxis])
+    dans_segment[np.nonzero(position_segment)[0],
+                 parents_1[position_segment]] = True
+
+    # Positions parcourues à partir de la fin du segment : le segment se retrouve à la fin
+    rotation = (fin[:, np.newaxis] + colonnes) % nombre_villes
+    enfants_tournes = parents_1[lignes, rotation]
+    parents_2_tournes = parents_2[lignes, rotation]
+    # Les villes absentes du segment, dans l'ordre du second parent, complètent l'enfant
+    remplissage = colonnes < (nombre_villes - (fin - debut))[:, np.newaxis]
+    enfants_tournes[remplissage] = parents_2_tournes[~dans_segment[lignes,
+                                                                   parents_2_tournes]]
+
+    enfants = np.empty_like(parents_1)
+    enfants[lignes, rotation] = enfants_tournes
+    return enfants
+
+
+def croisement_pmx(parents_1: np.ndarray, parents_2: np.ndarray) -> np.ndarray:
+    """Croisement par correspondance partielle (PMX) de chaque couple de parents
+
+    L'enfant est le second parent dans lequel on recopie un segment du premier. Une ville
+    du second parent hors segment déjà présente dans le segment est remplacée en suivant
+    la correspondance entre les deux parents sur le segment.
+
+    Parameters
+    ----------
+    parents_1 : np.ndarray
+        premiers parents, une permutation des villes par ligne (sans retour au départ)
+    parents_2 : np.ndarray
+        seconds parents
+
+    Returns
+    -------
+    np.ndarray
+        les enfants, une permutation par ligne
+    """
+    nombre_enfants, nombre_villes = parents_1.shape
+    lignes = np.arange(nombre_enfants)[:, np.newaxis]
+    debut, fin = points_coupure(nombre_enfants, nombre_villes)
+    colonnes = np.arange(nombre_villes)
+    position_segment = (colonnes >= debut[:, np.newaxis]) & (
+        colonnes < fin[:, np.newaxis])
+
+    enfants = parents_2.copy()
+    enfants[position_segment] = parents_1[position_segment]
+    dans_segment = np.zeros((nombre_enfants, nombre_villes), dtype=bool)
+    dans_segment[np.nonzero(position_segment)[0],
+                 parents_1[position_segment]] = True
+    # Position de chaque ville dans le premier parent
+    position_1 = np.empty_like(parents_1)
+    position_1[lignes, parents_1] = colonnes
+
+    # Remplacement des doublons, au plus une étape par ville du segment
+    conflit = ~position_segment & dans_segment[lignes, enfants]
+    while conflit.any():
+        ligne, colonne = np.nonzero(conflit)
+        enfants[ligne, colonne] = parents_2[ligne,
+                                            position_1[ligne, enfants[ligne, colonne]]]
+        conflit = ~position_segment & dans_segment[lignes, enfants]
+    return enfants
+
+
+def croisement_eax(parent_a: np.ndarray, parent_b: np.ndarray, matrice_distance: np.ndarray, liste_voisins: list[list[int]] = None) -> np.ndarray:
+    """Croisement par assemblage d'arêtes simplifié (EAX) d'un couple de parents
+
+    1. On construit un cycle AB en empruntant alternativement une arête de A absente
+       de B et une arête de B absente de A, chacune n'étant utilisée qu'une fois.
+    2. Dans A, on remplace les arêtes de A du cycle par ses arêtes de B : chaque ville
+       garde deux voisines mais le résultat peut être formé de plusieurs sous-tours.
+    3. Tant qu'il reste plusieurs sous-tours, le plus petit est fusionné avec un autre
+       par l'échange de deux arêtes le moins coûteux, cherché parmi les voisins
+       candidats de ses villes (ou parmi toutes les villes à défaut).
+
+    Parameters
+    ----------
+    parent_a : np.ndarray
+        premier parent, permutation des villes (sans retour au départ)
+    parent_b : np.ndarray
+        second parent
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    liste_voisins : list[list[int]] (optionnel)
+        voisins candidats de chaque ville pour la fusion des sous-tours
+
+    Returns
+    -------
+    np.ndarray
+        l'enfant, une permutation des villes
+    """
+    nombre_villes = len(parent_a)
+    suivant_a, suivant_b = np.empty_like(parent_a), np.empty_like(parent_b)
+    suivant_a[parent_a] = np.roll(parent_a, -1)
+    suivant_b[parent_b] = np.roll(parent_b, -1)
+    precedent_a, precedent_b = np.empty_like(parent_a), np.empty_like(parent_b)
+    precedent_a[parent_a] = np.roll(parent_a, 1)
+    precedent_b[parent_b] = np.roll(parent_b, 1)
+
+    # Arêtes (v, suivant(v)) propres à chaque parent
+    propre_a = (suivant_b[parent_a] != suivant_a[parent_a]) & (
+        precedent_b[parent_a] != suivant_a[parent_a])
+    propre_b = (suivant_a[parent_b] != suivant_b[parent_b]) & (
+        precedent_a[parent_b] != suivant_b[parent_b])
+    if not propre_a.any():
+        return parent_a.copy()
+
+    aretes_a = [[] for _ in range(nombre_villes)]
+    aretes_b = [[] for _ in range(nombre_villes)]
+    for aretes, parent, suivant, propre in ((aretes_a, parent_a, suivant_a, propre_a), (aretes_b, parent_b, suivant_b, propre_b)):
+        for u, v in zip(parent[propre].tolist(), suivant[parent[propre]].tolist()):
+            aretes[u].append(v)
+            aretes[v].append(u)
+
+    # 1. Cycle AB. Chaque ville a autant d'arêtes propres à A qu'à B : on ne peut pas
+    # rester bloqué avant de revenir au départ par une arête de B
+    depart = int(np.random.choice(parent_a[propre_a]))
+    cycle = [depart]
+    ville, cote_a = depart, True
+    while True:
+        aretes = aretes_a if cote_a else aretes_b
+        suivante = aretes[ville].pop(np.random.randint(len(aretes[ville])))
+        aretes[suivante].remove(ville)
+        cycle.append(suivante)
+        ville, cote_a = suivante, not cote_a
+        if ville == depart and cote_a:
+            break
+
+    # 2. Solution intermédiaire : A privé des arêtes A du cycle plus ses arêtes B
+    voisines = [[p, s] for p, s in zip(precedent_a.tolist(), suivant_a.tolist())]
+    for k in range(len(cycle) - 1):
+        u, v = cycle[k], cycle[k+1]
+        if k % 2 == 0:
+            voisines[u].remove(v)
+            voisines[v].remove(u)
+        else:
+            voisines[u].append(v)
+            voisines[v].append(u)
+
+    # Numérotation des sous-tours
+    sous_tour = [-1] * nombre_villes
+    membres = []
+    for ville in range(nombre_villes):
+        if sous_tour[ville] != -1:
+            continue
+        numero, precedente, courante = len(membres), -1, ville
+        membres.append([])
+        while sous_tour[courante] == -1:
+            sous_tour[courante] = numero
+            membres[numero].append(courante)
+            suivante = voisines[courante][0] if voisines[courante][0] != precedente else voisines[courante][1]
+            precedente, courante = courante, suivante
+
+    # 3. Fusion des sous-tours, le plus petit d'abord
+    restants = set(range(len(membres)))
+    while len(restants) > 1:
+        numero = min(restants, key=lambda t: len(membres[t]))
+        meilleur_cout, meilleur_echange = np.inf, None
+        for u in membres[numero]:
+            if liste_voisins is not None:
+                candidats = [v for v in liste_voisins[u]
+                             if sous_tour[v] != numero]
+            else:
+                candidats = []
+            if not candidats:
+                # Ville la plus proche hors du sous-tour
+                distances = np.array(
+                    matrice_distance[u, :], dtype=np.float64)
+                distances[np.array(sous_tour) == numero] = np.inf
+                candidats = [int(np.argmin(distances))]
+            for u2 in set(voisines[u]):
+                for v in candidats:
+                    for v2 in set(voisines[v]):
+                        retrait = matrice_distance[u, u2] + \
+                            matrice_distance[v, v2]
+                        for x, y in ((v, v2), (v2, v)):
+                            cout = matrice_distance[u, x] + \
+                                matrice_distance[u2, y] - retrait
+                            if cout < meilleur_cout:
+                                meilleur_cout, meilleur_echange = cout, (
+                                    u, u2, v, v2, x, y)
+        u, u2, v, v2, x, y = meilleur_echange
+        voisines[u].remove(u2)
+        voisines[u2].remove(u)
+        voisines[v].remove(v2)
+        voisines[v2].remove(v)
+        voisines[u].append(x)
+        voisines[x].append(u)
+        voisines[u2].append(y)
+        voisines[y].append(u2)
+
+        cible = sous_tour[v]
+        for ville in membres[numero]:
+            sous_tour[ville] = cible
+        membres[cible].extend(membres[numero])
+        restants.remove(numero)
+
+    # Parcours du cycle obtenu
+    enfant = np.empty_like(parent_a)
+    precedente, courante = -1, int(parent_a[0])
+    for k in range(nombre_villes):
+        enfant[k] = courante
+        suivante = voisines[courante][0] if voisines[courante][0] != precedente else voisines[courante][1]
+        precedente, courante = courante, suivante
     return enfant
 
 
-def generation(trajets_originels: list[dict], nombre_de_trajet: int, pourcentage_mutation: float, matrice_distance: np.ndarray) -> list[dict]:
+def croisement(parents_1: np.ndarray, parents_2: np.ndarray, methode: str, matrice_distance: np.ndarray, liste_voisins: list[list[int]] = None) -> np.ndarray:
+    """Croisement de chaque couple de parents selon la méthode choisie
+
+    Parameters
+    ----------
+    parents_1 : np.ndarray
+        premiers parents, une permutation des villes par ligne (sans retour au départ)
+    parents_2 : np.ndarray
+        seconds parents
+    methode : str
+        croisement parmi `CROISEMENTS` (hors `aucun`)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    liste_voisins : list[list[int]] (optionnel)
+        voisins candidats de chaque ville, utilisés par l'EAX
+
+    Returns
+    -------
+    np.ndarray
+        les enfants, une permutation par ligne
+    """
+    if methode == 'ox':
+        return croisement_ox(parents_1, parents_2)
+    if methode == 'pmx':
+        return croisement_pmx(parents_1, parents_2)
+    # L'EAX travaille sur les arêtes de chaque couple, un couple à la fois
+    return np.array([croisement_eax(parent_a, parent_b, matrice_distance, liste_voisins)
+                     for parent_a, parent_b in zip(parents_1, parents_2)], dtype=parents_1.dtype)
+
+
+# La population converge : beaucoup d'enfants sont identiques entre eux ou à des trajets
+# déjà rencontrés, au sens du cycle parcouru (peu importe la ville de départ et le sens).
+# Leur distance est mémorisée sous une empreinte de la forme canonique du cycle.
+
+# Nombre maximal de trajets mémorisés
+TAILLE_CACHE = 100_000
+
+
+def forme_canonique(villes: np.ndarray) -> np.ndarray:
+    """Forme canonique des cycles : départ de la ville 0, puis vers la plus petite de ses
+    deux voisines
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        trajets, une ligne par trajet finissant par sa première ville
+
+    Returns
+    -------
+    np.ndarray
+        cycles canoniques, sans retour à la première ville
+    """
+    cycles = villes[:, :-1]
+    nombre_villes = cycles.shape[1]
+    debut = np.argmax(cycles == 0, axis=1)
+    cycles = np.take_along_axis(
+        cycles, (debut[:, np.newaxis] + np.arange(nombre_villes)) % nombre_villes, axis=1)
+    if nombre_villes > 2:
+        inverse = cycles[:, 1] > cycles[:, -1]
+        cycles[inverse, 1:] = cycles[inverse, :0:-1]
+    return cycles
+
+
+class CacheDistances:
+    """Distances des trajets déjà évalués, indexées par leur forme canonique
+
+    La clé d'un trajet est une empreinte de 16 octets de sa forme canonique : la
+    mémoire du cache ne dépend pas du nombre de villes. Le cache est borné : au-delà
+    de `taille_max` trajets, les plus anciens sont oubliés.
+    """
+
+    def __init__(self, taille_max: int = TAILLE_CACHE):
+        self.taille_max = taille_max
+        self.distances = {}
+        self.nombre_requetes = 0
+        self.nombre_succes = 0
+
+    def evaluation(self, villes: np.ndarray, matrice_distance: np.ndarray) -> np.ndarray:
+        """Distance de chaque trajet, seuls les cycles jamais rencontrés étant évalués
+
+        Parameters
+        ----------
+        villes : np.ndarray
+            trajets à évaluer, une ligne par trajet
+        matrice_distance : np.ndarray
+            matrice stockant l'integralité des distances inter villes
+
+        Returns
+        -------
+        np.ndarray
+            distance de chaque trajet
+        """
+        cles = [hashlib.blake2b(cycle.tobytes(), digest_size=16).digest()
+                for cycle in forme_canonique(villes)]
+        distances = np.empty(len(villes))
+        # Trajets à évaluer, un doublon n'étant évalué qu'une fois
+        a_evaluer = {}
+        for i, cle in enumerate(cles):
+            distance = self.distances.get(cle)
+            if distance is None:
+                a_evaluer.setdefault(cle, i)
+            else:
+                distances[i] = distance
+
+        if a_evaluer:
+            nouvelles = dict(zip(a_evaluer, distances_trajets(
+                villes[list(a_evaluer.values())], matrice_distance).tolist()))
+            for i, cle in enumerate(cles):
+                if cle in nouvelles:
+                    distances[i] = nouvelles[cle]
+            for cle, distance in nouvelles.items():
+                self.ajout(cle, distance)
+
+        self.nombre_requetes += len(cles)
+        self.nombre_succes += len(cles) - len(a_evaluer)
+        return distances
+
+    def ajout(self, cle: bytes, distance: float) -> None:
+        """Mémorisation d'une distance, en oubliant le plus ancien trajet si le cache est plein"""
+        if self.taille_max <= 0:
+            return
+        if len(self.distances) >= self.taille_max:
+            del self.distances[next(iter(self.distances))]
+        self.distances[cle] = distance
+
+    def ajout_statistiques(self, nombre_requetes: int, nombre_succes: int) -> None:
+        """Prise en compte des requêtes d'un autre cache (île dans un autre processus)"""
+        self.nombre_requetes += nombre_requetes
+        self.nombre_succes += nombre_succes
+
+    def taux_succes(self) -> float:
+        """Part des trajets dont la distance était déjà connue"""
+        if self.nombre_requetes == 0:
+            return 0.0
+        return self.nombre_succes / self.nombre_requetes
+
+
+def generation(villes: np.ndarray, distances: np.ndarray, nombre_de_trajet: int, pourcentage_mutation: float, matrice_distance: np.ndarray, methode_croisement: str = 'aucun', liste_voisins: list[list[int]] = None, methode_mutation: str = 'echange', cache: CacheDistances = None) -> tuple[np.ndarray, np.ndarray]:
     """Génération d'une nouvelle population de N trajets
 
     Generation de m nouveaux trajets pour compléter la population sélectionnée. Ces nouveaux
@@ -184,54 +650,481 @@ def generation(trajets_originels: list[dict], nombre_de_trajet: int, pourcentage
 
     Parameters
     ----------
-    trajets_originels : list[dict]
+    villes : np.ndarray
         ensemble des trajets sélectionnés
+    distances : np.ndarray
+        distance de chaque trajet sélectionné
     nombre_de_trajet : int
         taille de la population initiale
     pourcentage_mutation : int
         probabilité qu'un trajet mute
     matrice_distance : np.ndarray
         matrice stockant l'integralité des distances inter villes
+    methode_croisement : str (optionnel)
+        croisement parmi `CROISEMENTS`
+    liste_voisins : list[list[int]] (optionnel)
+        voisins candidats de chaque ville, utilisés par l'EAX
+    methode_mutation : str (optionnel)
+        mutation parmi `MUTATIONS`
+    cache : CacheDistances (optionnel)
+        distances des trajets déjà évalués
 
     Returns
     -------
-    list[dict]
+    villes : np.ndarray
         population complète
+    distances : np.ndarray
+        distance de chaque trajet
     """
-    while len(trajets_originels) < nombre_de_trajet:
-        for trajet in trajets_originels:
-            # Génération des altérations : mutation, croisement, ...
-            if probabilite(pourcentage_mutation):
-                trajet = mutation_aleatoire(trajet)
-                trajet = evaluation(trajet, matrice_distance)
-                trajets_originels.append(trajet)
-    return trajets_originels
+    nombre_enfants = nombre_de_trajet - len(villes)
+
+    if methode_croisement == 'aucun':
+        # Comme en parcourant les trajets originels en boucle, chacun donnant un enfant
+        # muté avec une probabilité `pourcentage_mutation` : on tire assez de parcours d'un coup
+        nombre_parcours = int(np.ceil(nombre_enfants /
+                              (len(villes) * pourcentage_mutation))) + 1
+        parents = np.tile(np.arange(len(villes)), nombre_parcours)
+        parents = parents[np.random.rand(
+            len(parents)) < pourcentage_mutation][:nombre_enfants]
+        while len(parents) < nombre_enfants:
+            parents = np.append(parents, np.random.randint(
+                len(villes), size=nombre_enfants - len(parents)))
+
+        # Génération des altérations. La distance d'un enfant est celle de son parent
+        # corrigée de la variation due à la mutation
+        enfants, delta = mutation(
+            villes[parents], methode_mutation, matrice_distance)
+        distances_enfants = distances[parents] + delta
+    else:
+        # Couples de parents distincts tirés parmi les trajets sélectionnés
+        parents_1 = np.random.randint(len(villes), size=nombre_enfants)
+        parents_2 = np.random.randint(
+            max(1, len(villes) - 1), size=nombre_enfants)
+        parents_2 += (parents_2 >= parents_1) & (len(villes) > 1)
+        enfants = croisement(villes[parents_1, :-1], villes[parents_2, :-1],
+                             methode_croisement, matrice_distance, liste_voisins)
+        # Le marchand revient sur ses pas
+        enfants = np.hstack((enfants, enfants[:, :1]))
+        # Seuls les enfants issus d'un croisement sont évalués entièrement, en une fois
+        distances_enfants = evaluation(enfants, matrice_distance, cache)
+        # Mutation d'une partie des enfants
+        mutants = np.random.rand(nombre_enfants) < pourcentage_mutation
+        enfants[mutants], delta = mutation(
+            enfants[mutants], methode_mutation, matrice_distance)
+        distances_enfants[mutants] += delta
+
+    return np.vstack((villes, enfants)), np.concatenate((distances, distances_enfants))
 
 
-def evaluation(trajet: dict, matrice_distance: np.ndarray) -> dict:
+def evaluation(villes: np.ndarray, matrice_distance: np.ndarray, cache: CacheDistances = None) -> np.ndarray:
     """Fonction d'évaluation de l'algorithme
 
     Evaluation de la population. Plus un trajet est court plus il est considéré comme bon
 
     Parameters
     ----------
-    trajet : dict
-        ordre de parcours des villes avec distance relative
+    villes : np.ndarray
+        trajets à évaluer, une ligne par trajet
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    cache : CacheDistances (optionnel)
+        distances des trajets déjà évalués. Par défaut tous les trajets sont évalués
+
+    Returns
+    -------
+    np.ndarray
+        distance de chaque trajet
+    """
+    if cache is None:
+        return distances_trajets(villes, matrice_distance)
+    return cache.evaluation(villes, matrice_distance)
+
+
+# Algorithme mémétique : chaque enfant est amélioré par une recherche locale (2-opt et
+# Or-opt sur les voisins candidats) avant d'entrer dans la population. L'algorithme
+# génétique explore, la recherche locale exploite : seuls des optimums locaux sont
+# croisés entre eux. La recherche est bornée pour garder des epoch courtes, les enfants
+# étant repris à chaque génération. Les enfants sont répartis entre plusieurs processus.
+# Cf. https://en.wikipedia.org/wiki/Memetic_algorithm
+
+# Nombre maximal de villes examinées par la recherche locale, par ville du trajet
+EXAMENS_POLISSAGE = 1
+
+# Nombre de voisins candidats par ville pour la recherche locale
+NOMBRE_VOISINS_POLISSAGE = 8
+
+# Nombre de processus de recherche locale par défaut : un par coeur
+NOMBRE_PROCESSUS = os.cpu_count() or 1
+
+
+def polissage(enfants: np.ndarray, matrice_distance: np.ndarray, voisins: np.ndarray) -> np.ndarray:
+    """Amélioration des enfants par une recherche locale 2-opt et Or-opt bornée
+
+    Parameters
+    ----------
+    enfants : np.ndarray
+        trajets à améliorer, une ligne par trajet
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville, triés par distance croissante
+
+    Returns
+    -------
+    np.ndarray
+        trajets améliorés, chacun commençant par la même ville qu'avant
+    """
+    nombre_max_examens = EXAMENS_POLISSAGE * (enfants.shape[1] - 1)
+    enfants_polis = np.empty_like(enfants)
+    for i, enfant in enumerate(enfants.tolist()):
+        enfants_polis[i], _ = recherche_segments(
+            enfant, matrice_distance, voisins, LONGUEUR_OR_OPT, True, nombre_max_examens=nombre_max_examens)
+    return enfants_polis
+
+
+# Matrice des distances et voisins candidats d'un processus de recherche locale
+_matrice_polissage = None
+_voisins_polissage = None
+
+
+def init_polissage(source: str, voisins: np.ndarray) -> None:
+    """Ouverture de la matrice partagée dans un processus de recherche locale
+
+    Parameters
+    ----------
+    source : str
+        matrice transmise par `src.cache_distance.source_partagee`
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville
+    """
+    global _matrice_polissage, _voisins_polissage
+    _matrice_polissage = ouverture_partagee(source)
+    _voisins_polissage = voisins
+
+
+def polissage_processus(enfants: np.ndarray) -> np.ndarray:
+    """Amélioration d'une partie des enfants dans un processus, voir `polissage`"""
+    return polissage(enfants, _matrice_polissage, _voisins_polissage)
+
+
+def polissage_parallele(enfants: np.ndarray, executeur: ProcessPoolExecutor, nombre_processus: int) -> np.ndarray:
+    """Amélioration des enfants répartis entre les processus de recherche locale
+
+    Parameters
+    ----------
+    enfants : np.ndarray
+        trajets à améliorer, une ligne par trajet
+    executeur : ProcessPoolExecutor
+        processus initialisés par `init_polissage`
+    nombre_processus : int
+        nombre de processus de l'exécuteur
+
+    Returns
+    -------
+    np.ndarray
+        trajets améliorés
+    """
+    lots = np.array_split(enfants, min(nombre_processus, len(enfants)))
+    return np.vstack(list(executeur.map(polissage_processus, lots)))
+
+
+def evolution(villes: np.ndarray, distances: np.ndarray, nombre_epoch: int, matrice_distance: np.ndarray, methode_croisement: str, liste_voisins: list[list[int]], methode_mutation: str, voisins_polissage: np.ndarray = None, executeur: ProcessPoolExecutor = None, nombre_processus: int = 1, cache: CacheDistances = None, patience: int = None, temps_max: float = None) -> tuple[np.ndarray, np.ndarray, int]:
+    """Evolution d'une population pendant un nombre d'epoch donné
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        population, une ligne par trajet
+    distances : np.ndarray
+        distance de chaque trajet
+    nombre_epoch : int
+        nombre de sélections et générations successives
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    methode_croisement : str
+        croisement parmi `CROISEMENTS`
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, utilisés par l'EAX
+    methode_mutation : str
+        mutation parmi `MUTATIONS`
+    voisins_polissage : np.ndarray (optionnel)
+        voisins candidats de chaque ville pour la recherche locale des enfants
+        (algorithme mémétique). Par défaut les enfants ne sont pas améliorés
+    executeur : ProcessPoolExecutor (optionnel)
+        processus de recherche locale initialisés par `init_polissage`. Par défaut la
+        recherche locale a lieu dans le processus courant
+    nombre_processus : int (optionnel)
+        nombre de processus de l'exécuteur
+    cache : CacheDistances (optionnel)
+        distances des trajets déjà évalués
+    patience : int (optionnel)
+        arrêt après ce nombre d'epoch sans amélioration du meilleur trajet
+    temps_max : float (optionnel)
+        arrêt une fois ce temps écoulé (en s)
+
+    Returns
+    -------
+    villes : np.ndarray
+        population finale
+    distances : np.ndarray
+        distance de chaque trajet
+    epoch : int
+        nombre d'epoch effectuées
+    """
+    start_time = time.time()
+    nombre_de_trajet = len(villes)
+    meilleure_distance = distances.min()
+    epoch_sans_amelioration = 0
+    epoch = 0
+    while epoch < nombre_epoch:
+        # Sélection
+        villes, distances = selection(
+            villes, distances, POURCENTAGE_SELECTION)
+        nombre_selectionnes = len(villes)
+
+        # Génération
+        villes, distances = generation(
+            villes, distances, nombre_de_trajet, POURCENTAGE_MUTATION, matrice_distance, methode_croisement, liste_voisins, methode_mutation, cache)
+
+        # Recherche locale sur les seuls enfants
+        if voisins_polissage is not None:
+            if executeur is None:
+                enfants = polissage(
+                    villes[nombre_selectionnes:], matrice_distance, voisins_polissage)
+            else:
+                enfants = polissage_parallele(
+                    villes[nombre_selectionnes:], executeur, nombre_processus)
+            villes[nombre_selectionnes:] = enfants
+            distances[nombre_selectionnes:] = evaluation(
+                enfants, matrice_distance, cache)
+        epoch += 1
+
+        # Critères d'arrêt
+        if distances.min() < meilleure_distance:
+            meilleure_distance = distances.min()
+            epoch_sans_amelioration = 0
+        else:
+            epoch_sans_amelioration += 1
+        if patience is not None and epoch_sans_amelioration >= patience:
+            break
+        if temps_max is not None and time.time() - start_time >= temps_max:
+            break
+    return villes, distances, epoch
+
+
+# Modèle en îles : K sous-populations évoluent en parallèle, chacune dans un processus,
+# et s'échangent régulièrement leurs meilleurs trajets. Chaque île converge de son côté
+# ce qui limite la convergence prématurée de toute la population vers un même trajet.
+# Cf. https://en.wikipedia.org/wiki/Genetic_algorithm#Parallel_implementations
+
+# Nombre d'îles par défaut : une par coeur
+NOMBRE_ILES = os.cpu_count() or 1
+
+# Nombre d'epoch entre deux migrations
+INTERVALLE_MIGRATION = 10
+
+# Nombre de meilleurs trajets envoyés par une île à chaque migration
+NOMBRE_MIGRANTS = 2
+
+# Topologies des échanges entre îles :
+# - anneau : chaque île reçoit les meilleurs trajets de la précédente
+# - complet : chaque île reçoit les meilleurs trajets de toutes les autres
+TOPOLOGIES = ['anneau', 'complet']
+
+# Matrice des distances et voisins candidats d'un processus île, ouverts une seule fois
+# à son lancement
+_matrice_ile = None
+_voisins_ile = None
+_voisins_polissage_ile = None
+_cache_ile = None
+
+
+def init_ile(source: str, liste_voisins: list[list[int]], voisins_polissage: np.ndarray, taille_cache: int) -> None:
+    """Ouverture de la matrice partagée dans un processus île
+
+    Parameters
+    ----------
+    source : str
+        matrice transmise par `src.cache_distance.source_partagee`
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, utilisés par l'EAX
+    voisins_polissage : np.ndarray
+        voisins candidats de chaque ville pour la recherche locale des enfants
+    taille_cache : int
+        nombre maximal de trajets mémorisés par le processus, 0 pour ne rien mémoriser
+    """
+    global _matrice_ile, _voisins_ile, _voisins_polissage_ile, _cache_ile
+    _matrice_ile = ouverture_partagee(source)
+    _voisins_ile = liste_voisins
+    _voisins_polissage_ile = voisins_polissage
+    _cache_ile = CacheDistances(taille_cache) if taille_cache > 0 else None
+
+
+def evolution_ile(villes: np.ndarray, distances: np.ndarray, nombre_epoch: int, graine: int, methode_croisement: str, methode_mutation: str) -> tuple[np.ndarray, np.ndarray, tuple[int, int]]:
+    """Evolution d'une île dans son processus, voir `evolution`
+
+    Parameters
+    ----------
+    graine : int
+        graine du générateur aléatoire, distincte pour chaque île et chaque période
+
+    Returns
+    -------
+    villes : np.ndarray
+        population finale
+    distances : np.ndarray
+        distance de chaque trajet
+    statistiques : tuple[int, int]
+        nombre de requêtes et de succès du cache du processus pendant l'évolution
+    """
+    np.random.seed(graine)
+    requetes, succes = (_cache_ile.nombre_requetes,
+                        _cache_ile.nombre_succes) if _cache_ile is not None else (0, 0)
+    # Chaque île étant déjà un processus, sa recherche locale s'y déroule directement
+    villes, distances, _ = evolution(villes, distances, nombre_epoch, _matrice_ile, methode_croisement,
+                                     _voisins_ile, methode_mutation, _voisins_polissage_ile, cache=_cache_ile)
+    if _cache_ile is not None:
+        requetes, succes = _cache_ile.nombre_requetes - \
+            requetes, _cache_ile.nombre_succes - succes
+    return villes, distances, (requetes, succes)
+
+
+def migration(populations: list[tuple[np.ndarray, np.ndarray]], topologie: str, nombre_migrants: int) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Echange des meilleurs trajets entre les îles
+
+    Les migrants reçus par une île remplacent ses plus mauvais trajets.
+
+    Parameters
+    ----------
+    populations : list[tuple[np.ndarray, np.ndarray]]
+        trajets et distances de chaque île
+    topologie : str
+        topologie des échanges parmi `TOPOLOGIES`
+    nombre_migrants : int
+        nombre de trajets envoyés par chaque île
+
+    Returns
+    -------
+    list[tuple[np.ndarray, np.ndarray]]
+        populations après migration
+    """
+    nombre_iles = len(populations)
+    # Meilleurs trajets de chaque île, avant toute arrivée
+    emigrants = []
+    for villes, distances in populations:
+        meilleurs = np.argsort(distances)[:nombre_migrants]
+        emigrants.append((villes[meilleurs], distances[meilleurs]))
+
+    nouvelles_populations = []
+    for ile, (villes, distances) in enumerate(populations):
+        if topologie == 'anneau':
+            origines = [(ile - 1) % nombre_iles]
+        else:
+            origines = [autre for autre in range(nombre_iles) if autre != ile]
+        villes_recues = np.vstack([emigrants[origine][0]
+                                   for origine in origines])
+        distances_recues = np.concatenate(
+            [emigrants[origine][1] for origine in origines])
+
+        # Remplacement des plus mauvais trajets de l'île
+        nombre_recus = min(len(distances_recues), len(distances) - 1)
+        pires = np.argsort(distances)[len(distances) - nombre_recus:]
+        villes, distances = villes.copy(), distances.copy()
+        villes[pires] = villes_recues[:nombre_recus]
+        distances[pires] = distances_recues[:nombre_recus]
+        nouvelles_populations.append((villes, distances))
+    return nouvelles_populations
+
+
+def evolution_iles(data: pd.DataFrame, matrice_distance: np.ndarray, nombre_epoch: int, nombre_iles: int, intervalle_migration: int, topologie: str, methode_croisement: str, liste_voisins: list[list[int]], methode_mutation: str, voisins_polissage: np.ndarray = None, cache: CacheDistances = None, patience: int = None, temps_max: float = None) -> tuple[np.ndarray, np.ndarray, int]:
+    """Algorithme génétique en îles, une île par processus
+
+    La matrice des distances n'est pas copiée dans chaque processus : elle est partagée en
+    lecture seule par le cache disque (cf. `src.cache_distance.source_partagee`).
+
+    Parameters
+    ----------
+    data : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
     matrice_distance : np.ndarray
         matrice stockant l'integralité des distances inter villes
+    nombre_epoch : int
+        nombre total d'epoch de chaque île
+    nombre_iles : int
+        nombre d'îles, chacune de `NOMBRE_TRAJET` trajets
+    intervalle_migration : int
+        nombre d'epoch entre deux migrations
+    topologie : str
+        topologie des échanges parmi `TOPOLOGIES`
+    methode_croisement : str
+        croisement parmi `CROISEMENTS`
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, utilisés par l'EAX
+    methode_mutation : str
+        mutation parmi `MUTATIONS`
+    voisins_polissage : np.ndarray (optionnel)
+        voisins candidats de chaque ville pour la recherche locale des enfants
+    cache : CacheDistances (optionnel)
+        chaque île mémorise ses propres trajets dans un cache de même taille, celui-ci
+        ne fait que cumuler leurs statistiques. Par défaut rien n'est mémorisé
+    patience : int (optionnel)
+        arrêt après ce nombre d'epoch sans amélioration du meilleur trajet de toutes les
+        îles, vérifié à chaque migration
+    temps_max : float (optionnel)
+        arrêt une fois ce temps écoulé (en s), vérifié à chaque migration
 
     Returns
     -------
-    dict
-        un trajet avec sa distance mise à jour
+    villes : np.ndarray
+        réunion des populations finales des îles
+    distances : np.ndarray
+        distance de chaque trajet
+    epoch : int
+        nombre d'epoch effectuées par chaque île
     """
-    maj_trajet = copy.deepcopy(trajet)
-    maj_trajet['Distance'] = distance_trajet(
-        trajet['Villes'], matrice_distance)
-    return maj_trajet
+    start_time = time.time()
+    populations = [init_population(NOMBRE_TRAJET, data, matrice_distance)
+                   for _ in range(nombre_iles)]
+
+    with ProcessPoolExecutor(max_workers=nombre_iles, initializer=init_ile,
+                             initargs=(source_partagee(matrice_distance), liste_voisins, voisins_polissage,
+                                       cache.taille_max if cache is not None else 0)) as executeur:
+        meilleure_distance = min(distances.min() for _, distances in populations)
+        epoch_sans_amelioration = 0
+        epoch = 0
+        while epoch < nombre_epoch:
+            periode = min(intervalle_migration, nombre_epoch - epoch)
+            graines = np.random.randint(2**31, size=nombre_iles)
+            futurs = [executeur.submit(evolution_ile, villes, distances, periode, int(graine), methode_croisement, methode_mutation)
+                      for (villes, distances), graine in zip(populations, graines)]
+            populations = []
+            for futur in futurs:
+                villes, distances, statistiques = futur.result()
+                populations.append((villes, distances))
+                if cache is not None:
+                    cache.ajout_statistiques(*statistiques)
+            epoch += periode
+
+            # Critères d'arrêt
+            distance = min(distances.min() for _, distances in populations)
+            if distance < meilleure_distance:
+                meilleure_distance = distance
+                epoch_sans_amelioration = 0
+            else:
+                epoch_sans_amelioration += periode
+            if patience is not None and epoch_sans_amelioration >= patience:
+                break
+            if temps_max is not None and time.time() - start_time >= temps_max:
+                break
+
+            if epoch < nombre_epoch:
+                populations = migration(
+                    populations, topologie, NOMBRE_MIGRANTS)
 
+    return np.vstack([villes for villes, _ in populations]), np.concatenate([distances for _, distances in populations]), epoch
 
-def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="") -> pd.DataFrame:
+
+def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="", methode_croisement: str = 'aucun', methode_mutation: str = 'echange', nombre_iles: int = 1, intervalle_migration: int = INTERVALLE_MIGRATION, topologie: str = 'anneau', memetique: bool = False, nombre_processus: int = NOMBRE_PROCESSUS, patience: int = PATIENCE, temps_max: float = None, taille_cache: int = TAILLE_CACHE) -> pd.DataFrame:
     """Lancement de l'algorithme de recherche 
 
     Parameters
@@ -242,6 +1135,28 @@ def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="") -> pd
         matrice stockant l'integralité des distances inter villes
     nom_dataset : str (optionnel)
         nom du dataset à traiter
+    methode_croisement : str (optionnel)
+        croisement parmi `CROISEMENTS`, par défaut `aucun` : évolution par mutations seules
+    methode_mutation : str (optionnel)
+        mutation parmi `MUTATIONS`
+    nombre_iles : int (optionnel)
+        nombre de sous-populations évoluant en parallèle, 1 pour l'algorithme classique
+        et `NOMBRE_ILES` pour utiliser tous les coeurs
+    intervalle_migration : int (optionnel)
+        nombre d'epoch entre deux migrations entre îles
+    topologie : str (optionnel)
+        topologie des échanges entre îles parmi `TOPOLOGIES`
+    memetique : bool (optionnel)
+        si vrai, chaque enfant est amélioré par une recherche locale 2-opt et Or-opt
+    nombre_processus : int (optionnel)
+        nombre de processus de recherche locale de l'algorithme mémétique sans îles
+    patience : int (optionnel)
+        arrêt après ce nombre d'epoch sans amélioration, None pour effectuer toutes les
+        epoch
+    temps_max : float (optionnel)
+        temps alloué à la recherche (en s), sans limite par défaut
+    taille_cache : int (optionnel)
+        nombre maximal de trajets dont la distance est mémorisée, 0 pour ne rien mémoriser
 
     Returns
     -------
@@ -249,30 +1164,50 @@ def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="") -> pd
         variable stockant un ensemble de variables importantes pour analyser
         l'algorithme
     """
-    # Initialisation de n individus initiaux (Génèse)
-    trajets_initiaux = init_population(NOMBRE_TRAJET, data, matrice_distance)
+    assert methode_croisement in CROISEMENTS, print(
+        "Veuillez choisir un croisement parmi : {}".format(CROISEMENTS))
+    assert methode_mutation in MUTATIONS, print(
+        "Veuillez choisir une mutation parmi : {}".format(MUTATIONS))
+    assert topologie in TOPOLOGIES, print(
+        "Veuillez choisir une topologie parmi : {}".format(TOPOLOGIES))
 
-    # Initialisation du nombre d'epoch
-    epoch = 0
+    # Voisins candidats pour la fusion des sous-tours de l'EAX
+    liste_voisins = None
+    if methode_croisement == 'eax':
+        liste_voisins = voisins_candidats(
+            construction_index(data)).tolist()
+    # Voisins candidats pour la recherche locale de l'algorithme mémétique
+    voisins_polissage = None
+    if memetique:
+        voisins_polissage = voisins_candidats(
+            construction_index(data), NOMBRE_VOISINS_POLISSAGE)
+
+    # Mémoïsation des distances des trajets
+    cache = CacheDistances(taille_cache) if taille_cache > 0 else None
 
     # Evaluation du temps de calcul
     start = time.time()
-    # On arrete l'algorithme après un nombre d'epoch fixé. Pour permettre de visualiser
-    # un résultat même si la solution est moyenne.
-    while epoch <= NOMBRE_EPOCH:
-        epoch += 1
-        # Tri
-        trajets_ordonnes = individus_ordonnes(trajets_initiaux)
-
-        # Sélection
-        meilleurs_trajets = selection(trajets_ordonnes, POURCENTAGE_SELECTION)
-
-        # Génération
-        trajets_initiaux = generation(
-            meilleurs_trajets, NOMBRE_TRAJET, POURCENTAGE_MUTATION, matrice_distance)
+    # On arrete l'algorithme après un nombre d'epoch fixé, ou plus tôt si le meilleur
+    # trajet ne s'améliore plus ou si le temps alloué est écoulé. Pour permettre de
+    # visualiser un résultat même si la solution est moyenne.
+    if nombre_iles > 1:
+        villes, distances, epoch = evolution_iles(data, matrice_distance, NOMBRE_EPOCH + 1, nombre_iles, intervalle_migration, topologie,
+                                                  methode_croisement, liste_voisins, methode_mutation, voisins_polissage, cache, patience, temps_max)
+    else:
+        # Initialisation de n individus initiaux (Génèse)
+        villes, distances = init_population(
+            NOMBRE_TRAJET, data, matrice_distance)
+        if memetique and nombre_processus > 1:
+            with ProcessPoolExecutor(max_workers=nombre_processus, initializer=init_polissage,
+                                     initargs=(source_partagee(matrice_distance), voisins_polissage)) as executeur:
+                villes, distances, epoch = evolution(villes, distances, NOMBRE_EPOCH + 1, matrice_distance, methode_croisement, liste_voisins,
+                                                     methode_mutation, voisins_polissage, executeur, nombre_processus, cache, patience, temps_max)
+        else:
+            villes, distances, epoch = evolution(villes, distances, NOMBRE_EPOCH + 1, matrice_distance, methode_croisement, liste_voisins,
+                                                 methode_mutation, voisins_polissage, cache=cache, patience=patience, temps_max=temps_max)
 
     # Chemin final trouvé
-    solution = trajets_initiaux[0]['Villes']
+    solution = villes[np.argmin(distances)].tolist()
     distance = distance_trajet(solution, matrice_distance)
     temps_calcul = time.time() - start
 
@@ -284,7 +1219,9 @@ def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="") -> pd
         # Dans un tableau pour être sur une seule ligne du dataframe
         'Solution': [solution],
         'Distance': distance,
-        'Temps de calcul (en s)': temps_calcul
+        'Temps de calcul (en s)': temps_calcul,
+        "Nombre d'epoch": epoch,
+        'Taux de succès du cache': cache.taux_succes() if cache is not None else 0.0
     })
 
     return df_resultat_test
@@ -0,0 +1,226 @@
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from src.distance import distance_trajet
+from src.index_spatial import construction_index
+
+# Construction gloutonne par arêtes (greedy edge). Les arêtes candidates sont triées de
+# la plus courte à la plus longue puis ajoutées une à une tant qu'elles ne donnent pas
+# à une ville plus de deux voisines et ne ferment pas de cycle avant la fin. Les arêtes
+# candidates sont limitées aux k plus proches voisins de chaque ville (KD-tree), et une
+# union-find détecte les cycles : O(n log n). Les fragments restants sont ensuite reliés
+# entre eux par leurs extrémités.
+# Le trajet obtenu est plus court que celui du plus proche voisin et le 2-opt converge
+# bien plus vite en partant de ce chemin.
+
+# Cf. https://en.wikipedia.org/wiki/Greedy_algorithm
+
+# Nombre de voisins candidats par ville
+NOMBRE_VOISINS_GLOUTON = 8
+
+
+def racine(parent: list[int], ville: int) -> int:
+    """Représentant du fragment d'une ville dans l'union-find (avec compression de chemin)
+
+    Parameters
+    ----------
+    parent : list[int]
+        parent de chaque ville dans l'union-find, modifié sur place
+    ville : int
+        ville recherchée
+
+    Returns
+    -------
+    int
+        ville représentant le fragment
+    """
+    representant = ville
+    while parent[representant] != representant:
+        representant = parent[representant]
+    while parent[ville] != representant:
+        parent[ville], ville = representant, parent[ville]
+    return representant
+
+
+def ajout_aretes(aretes: np.ndarray, longueurs: np.ndarray, parent: list[int], degre: list[int], voisines: list[list[int]]) -> int:
+    """Ajout glouton des arêtes candidates, de la plus courte à la plus longue
+
+    Parameters
+    ----------
+    aretes : np.ndarray
+        arêtes candidates, tableau m x 2 de villes
+    longueurs : np.ndarray
+        longueur de chaque arête candidate
+    parent : list[int]
+        union-find des fragments, modifiée sur place
+    degre : list[int]
+        nombre d'arêtes de chaque ville, modifié sur place
+    voisines : list[list[int]]
+        villes reliées à chaque ville, modifiées sur place
+
+    Returns
+    -------
+    int
+        nombre d'arêtes ajoutées
+    """
+    nombre_ajouts = 0
+    ordre = np.argsort(longueurs, kind='stable')
+    for a, b in zip(aretes[ordre, 0].tolist(), aretes[ordre, 1].tolist()):
+        if degre[a] == 2 or degre[b] == 2:
+            continue
+        # Une ville sans arête est seule dans son fragment
+        racine_a = a if degre[a] == 0 else racine(parent, a)
+        racine_b = b if degre[b] == 0 else racine(parent, b)
+        # L'arête fermerait un cycle
+        if racine_a == racine_b:
+            continue
+        parent[racine_a] = racine_b
+        degre[a] += 1
+        degre[b] += 1
+        voisines[a].append(b)
+        voisines[b].append(a)
+        nombre_ajouts += 1
+    return nombre_ajouts
+
+
+def aretes_candidates(coordonnees: np.ndarray, villes: np.ndarray, index: cKDTree, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Arêtes entre chaque ville et ses k plus proches voisins, sans doublon
+
+    Parameters
+    ----------
+    coordonnees : np.ndarray
+        coordonnées 2D de toutes les villes
+    villes : np.ndarray
+        villes indexées par `index`, dans l'ordre de l'index
+    index : cKDTree
+        index spatial des villes de `villes`
+    k : int
+        nombre de voisins par ville
+
+    Returns
+    -------
+    aretes : np.ndarray
+        tableau m x 2 de villes
+    longueurs : np.ndarray
+        longueur de chaque arête
+    """
+    k = min(k, len(villes) - 1)
+    longueurs, voisins = index.query(coordonnees[villes], k=k+1, workers=-1)
+    longueurs, voisins = longueurs[:, 1:].ravel(), voisins[:, 1:].ravel()
+    a = np.repeat(villes, k)
+    b = villes[voisins]
+    # Chaque arête n'est conservée qu'une fois : on dédoublonne les arêtes (a, b), a < b,
+    # codées par un seul entier
+    conserve = a < b
+    _, unique = np.unique(a[conserve].astype(np.int64) * len(coordonnees) + b[conserve],
+                          return_index=True)
+    aretes = np.stack((a[conserve][unique], b[conserve][unique]), axis=1)
+    return aretes, longueurs[conserve][unique]
+
+
+def glouton(villes: pd.DataFrame | np.ndarray, k: int = NOMBRE_VOISINS_GLOUTON) -> tuple[list[int], float]:
+    """Retourne le trajet construit par ajout glouton des arêtes les plus courtes
+
+    Parameters
+    ----------
+    villes : DataFrame | np.ndarray
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+        ou directement un tableau de points 2D
+    k : int (optionnel)
+        nombre de voisins candidats par ville
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé, il commence et finit par la ville 0
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    if isinstance(villes, pd.DataFrame):
+        villes = villes[['x', 'y']].to_numpy(dtype=np.float64)
+    nombre_ville = len(villes)
+
+    parent = list(range(nombre_ville))
+    degre = [0] * nombre_ville
+    voisines = [[] for _ in range(nombre_ville)]
+
+    # Arêtes entre voisins proches
+    nombre_aretes = 0
+    if nombre_ville > 1:
+        aretes, longueurs = aretes_candidates(
+            villes, np.arange(nombre_ville), construction_index(villes), k)
+        nombre_aretes = ajout_aretes(
+            aretes, longueurs, parent, degre, voisines)
+
+    # Raccordement des fragments (chemins et villes isolées) par leurs extrémités. Si
+    # aucune arête n'a pu être ajoutée, on élargit le voisinage
+    while nombre_aretes < nombre_ville - 1:
+        extremites = np.flatnonzero(np.array(degre) < 2)
+        aretes, longueurs = aretes_candidates(
+            villes, extremites, construction_index(villes[extremites]), k)
+        ajouts = ajout_aretes(aretes, longueurs, parent, degre, voisines)
+        if ajouts == 0:
+            k *= 2
+        nombre_aretes += ajouts
+
+    # Parcours du chemin hamiltonien obtenu depuis l'une de ses extrémités
+    ville = degre.index(min(degre))
+    chemin = [ville]
+    precedente = -1
+    for _ in range(nombre_ville - 1):
+        suivante = voisines[ville][0] if voisines[ville][0] != precedente else voisines[ville][1]
+        precedente, ville = ville, suivante
+        chemin.append(ville)
+
+    # Le trajet commence par la ville 0 comme pour `plus_proche_voisin`
+    depart = chemin.index(0)
+    itineraire = chemin[depart:] + chemin[:depart]
+
+    # On pense à fermer le cycle
+    itineraire.append(itineraire[0])
+
+    temps_calcul = time.time() - start_time
+    return itineraire, temps_calcul
+
+
+def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="") -> pd.DataFrame:
+    """Lancement de la construction gloutonne par arêtes
+
+    Parameters
+    ----------
+    data : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    nom_dataset : str (optionnel)
+        nom du dataset à traiter
+
+    Returns
+    -------
+    df_resultat_test : Dataframe
+        variable stockant un ensemble de variables importantes pour analyser
+        l'algorithme
+    """
+    # Résolution du TSP
+    itineraire, temps_calcul = glouton(data)
+
+    # Calcul de la distance du trajet final trouvé par l'algorithme
+    distance_chemin_sub_optimal = distance_trajet(itineraire, matrice_distance)
+
+    # Création du dataframe à retourner
+    df_resultat_test = pd.DataFrame({
+        'Algorithme': "glouton",
+        'Nom dataset': nom_dataset,
+        'Nombre de villes': len(itineraire)-1,
+        # Dans un tableau pour être sur une seule ligne du dataframe
+        'Solution': [itineraire],
+        'Distance': distance_chemin_sub_optimal,
+        'Temps de calcul (en s)': temps_calcul
+    })
+
+    return df_resultat_test
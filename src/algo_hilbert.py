@@ -0,0 +1,134 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.distance import distance_trajet
+
+# Construction d'un trajet en parcourant les villes dans l'ordre d'une courbe de Hilbert.
+# Cette courbe remplit le plan en passant par des points voisins : deux villes proches
+# sur la courbe sont proches dans le plan. Trier les villes selon leur indice sur la
+# courbe donne en O(n log n) un trajet de 25 à 40% plus long que l'optimum, sans
+# aucune distance à calculer. Utile pour obtenir très vite un chemin initial sur des
+# instances de plusieurs millions de villes.
+
+# Cf. https://fr.wikipedia.org/wiki/Courbe_de_Hilbert
+
+# Nombre de bits par coordonnée : le plan est découpé en une grille 2^ORDRE x 2^ORDRE
+ORDRE_HILBERT = 16
+
+
+def indice_hilbert(x: np.ndarray, y: np.ndarray, ordre: int = ORDRE_HILBERT) -> np.ndarray:
+    """Indice sur la courbe de Hilbert des cases (x, y) d'une grille 2^ordre x 2^ordre
+
+    Parameters
+    ----------
+    x : np.ndarray
+        colonnes des cases, entiers de 0 à 2^ordre - 1
+    y : np.ndarray
+        lignes des cases, entiers de 0 à 2^ordre - 1
+    ordre : int (optionnel)
+        nombre de bits par coordonnée
+
+    Returns
+    -------
+    np.ndarray
+        indice de chaque case le long de la courbe
+    """
+    x = np.array(x, dtype=np.int64)
+    y = np.array(y, dtype=np.int64)
+    cote = 1 << ordre
+    indice = np.zeros(len(x), dtype=np.int64)
+
+    # Du quadrant le plus grand au plus petit, chaque étape traitant tous les points
+    s = cote >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        indice += s * s * ((3 * rx) ^ ry)
+        # Rotation du quadrant pour que la courbe y soit parcourue dans le bon sens
+        retourne = ~ry & rx
+        x = np.where(retourne, cote - 1 - x, x)
+        y = np.where(retourne, cote - 1 - y, y)
+        echange = ~ry
+        x, y = np.where(echange, y, x), np.where(echange, x, y)
+        s >>= 1
+
+    return indice
+
+
+def courbe_hilbert(villes: pd.DataFrame | np.ndarray, ordre: int = ORDRE_HILBERT) -> tuple[list[int], float]:
+    """Retourne le trajet parcourant les villes dans l'ordre de la courbe de Hilbert
+
+    Parameters
+    ----------
+    villes : DataFrame | np.ndarray
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+        ou directement un tableau de points 2D
+    ordre : int (optionnel)
+        nombre de bits par coordonnée de la grille
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé, il commence et finit par la ville 0
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    if isinstance(villes, pd.DataFrame):
+        villes = villes[['x', 'y']].to_numpy(dtype=np.float64)
+
+    # Mise à l'échelle des coordonnées sur la grille, en conservant les proportions
+    minimum = villes.min(axis=0)
+    etendue = max(float((villes.max(axis=0) - minimum).max()), 1e-12)
+    cases = ((villes - minimum) / etendue * ((1 << ordre) - 1)).astype(np.int64)
+
+    chemin = np.argsort(indice_hilbert(
+        cases[:, 0], cases[:, 1], ordre), kind='stable')
+
+    # Le trajet commence par la ville 0 comme pour `plus_proche_voisin`
+    chemin = np.roll(chemin, -int(np.flatnonzero(chemin == 0)[0]))
+    itineraire = chemin.tolist() + [0]
+
+    temps_calcul = time.time() - start_time
+    return itineraire, temps_calcul
+
+
+def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="") -> pd.DataFrame:
+    """Lancement de la construction par courbe de Hilbert
+
+    Parameters
+    ----------
+    data : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    nom_dataset : str (optionnel)
+        nom du dataset à traiter
+
+    Returns
+    -------
+    df_resultat_test : Dataframe
+        variable stockant un ensemble de variables importantes pour analyser
+        l'algorithme
+    """
+    # Résolution du TSP
+    itineraire, temps_calcul = courbe_hilbert(data)
+
+    # Calcul de la distance du trajet final trouvé par l'algorithme
+    distance_chemin_sub_optimal = distance_trajet(itineraire, matrice_distance)
+
+    # Création du dataframe à retourner
+    df_resultat_test = pd.DataFrame({
+        'Algorithme': "hilbert",
+        'Nom dataset': nom_dataset,
+        'Nombre de villes': len(itineraire)-1,
+        # Dans un tableau pour être sur une seule ligne du dataframe
+        'Solution': [itineraire],
+        'Distance': distance_chemin_sub_optimal,
+        'Temps de calcul (en s)': temps_calcul
+    })
+
+    return df_resultat_test
@@ -1,9 +1,13 @@
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
+from scipy.ndimage import convolve1d
 
 from src.distance import distance_trajet, neurone_gagnant
+from src.index_spatial import construction_index, plus_proche_point
 from src.init_test_data import normalisation
 
 # En s'inspirant des cours dispensés à l'ENSC en apprentissage automatique j'ai essayé
@@ -17,8 +21,36 @@ from src.init_test_data import normalisation
 # Nombre d'epoch maximal pour entrainer le réseau
 EPOCH_MAX = 100000
 
+# Seuls les neurones à moins de LARGEUR_FENETRE écarts types du neurone gagnant sont mis
+# à jour, l'attraction des autres étant négligeable (moins de 1,1% à 3 écarts types)
+LARGEUR_FENETRE = 3
 
-def creation_reseau(taille: int) -> np.ndarray:
+# Modes d'apprentissage :
+# - en_ligne : une ville par itération, le neurone gagnant et ses voisins se rapprochent
+#   de cette ville
+# - lot : à chaque étape, les gagnants de tout un lot de villes sont cherchés en une
+#   requête sur un KD-tree des neurones, puis chaque neurone est déplacé vers la moyenne
+#   des villes de son voisinage pondérée par la gaussienne (batch SOM)
+MODES_APPRENTISSAGE = ['en_ligne', 'lot']
+
+# Nombre de passages sur toutes les villes en mode lot
+EPOCH_LOT = 100
+
+# Rayon d'influence initial en mode lot, en part du nombre de neurones. Le rayon initial
+# du mode en ligne (un dixième) rassemblerait dès la première étape tout le réseau au
+# centre des villes
+RAYON_INITIAL_LOT = 1/40
+
+# Taux d'apprentissage des petits lots. Un lot contenant toutes les villes remplace
+# directement chaque neurone par sa moyenne pondérée (taux de 1)
+TAUX_APPRENTISSAGE_LOT = 0.5
+
+# Au-delà de cette largeur de gaussienne (en neurones), la convolution circulaire est
+# calculée par transformée de Fourier plutôt que directement
+LARGEUR_MAX_CONVOLUTION = 64
+
+
+def creation_reseau(taille: int, generateur: np.random.Generator = None) -> np.ndarray:
     """
     Création d'un réseau d'un taille donnée. Le réseau est une suite 1D de neurones
 
@@ -26,13 +58,17 @@ def creation_reseau(taille: int) -> np.ndarray:
     ----------
     taille : int 
         nombre de neuronnes à créer
+    generateur : np.random.Generator (optionnel)
+        générateur aléatoire à utiliser, par défaut celui global de numpy
 
     Returns
     -------
     np.ndarray
         un vecteur de dimension `taille` composé de neurones à 2 dimensions à valeur dans l'intervalle [0,1)
     """
-    return np.random.rand(taille, 2)
+    if generateur is None:
+        return np.random.rand(taille, 2)
+    return generateur.random((taille, 2))
 
 
 def voisinage(index_neuronne_gagnant: int, rayon: float, nombre_neurones: int) -> np.ndarray:
@@ -70,6 +106,39 @@ def voisinage(index_neuronne_gagnant: int, rayon: float, nombre_neurones: int) -
     return np.exp(-(distances*distances) / (2*(rayon*rayon)))  # type: ignore
 
 
+def fenetre_voisinage(rayon: float, nombre_neurones: int) -> tuple[np.ndarray, np.ndarray]:
+    """Gaussienne de `voisinage` restreinte à une fenêtre autour du neurone gagnant
+
+    La fenêtre s'étend sur `LARGEUR_FENETRE` écarts types de part et d'autre du neurone
+    gagnant. En fin d'apprentissage le rayon ne vaut plus que quelques neurones : la mise
+    à jour ne touche alors que ceux-ci au lieu de tout le réseau.
+
+    Parameters
+    ----------
+    rayon : float
+        rayon d'influence du neuronne gagnant (écart type de la gaussienne)
+    nombre_neurones : int
+        nombre de neurones dans le réseau
+
+    Returns
+    -------
+    decalages : np.ndarray
+        position des neurones de la fenêtre relativement au neurone gagnant
+    poids : np.ndarray
+        attraction de chacun de ces neurones
+    """
+    # Même écart type minimal que `voisinage`
+    rayon = max(rayon, 1)
+    demi_largeur = int(np.ceil(LARGEUR_FENETRE * rayon))
+
+    # La fenêtre couvre tout le cycle : chaque neurone n'y doit figurer qu'une fois
+    if 2 * demi_largeur + 1 >= nombre_neurones:
+        return np.arange(nombre_neurones), voisinage(0, rayon, nombre_neurones)
+
+    decalages = np.arange(-demi_largeur, demi_largeur + 1)
+    return decalages, np.exp(-(decalages*decalages) / (2*(rayon*rayon)))
+
+
 def chemin_final(villes: pd.DataFrame, neurones: np.ndarray) -> list[int]:
     """Recherche du chemin final trouvé par le réseau. 
 
@@ -85,62 +154,62 @@ def chemin_final(villes: pd.DataFrame, neurones: np.ndarray) -> list[int]:
 
     Returns
     -------
-    Dataframe
-        dataframe final des villes ordonnées
+    list[int]
+        index des villes dans l'ordre du réseau, le dataframe n'est pas modifié
     """
-    villes['ordre'] = villes[['x', 'y']].apply(
-        # convertion en int et non plus intp
-        lambda c: int(neurone_gagnant(neurones, c)),
-        # 1 or 'columns': on applique la fonction à chaque ligne.
-        axis=1, raw=True)
-    # Retourne un array représentant les données de l'index
-    route = villes.sort_values('ordre').index.values
+    # Un KD-tree sur les neurones donne le neurone gagnant de toutes les villes en une requête
+    ordre = plus_proche_point(
+        construction_index(neurones), villes[['x', 'y']].to_numpy(), -1)
+    # Index des villes triées selon leur neurone gagnant
+    route = villes.index.values[np.argsort(ordre, kind='stable')]
     # On fait attention à fermer le cycle
-    return list(np.append(route, route[0]))
+    return np.append(route, route[0]).tolist()
 
 
-def carte_auto_adaptatives(data: pd.DataFrame, iterations: int, taux_apprentissage=0.8) -> tuple[list[int], float, list[np.ndarray]]:
-    """Résolution du TSP en utilisant une Cartes auto-adaptatives
+def apprentissage_en_ligne(coordonnees: np.ndarray, neurones: np.ndarray, iterations: int, taux_apprentissage: float, generateur: np.random.Generator) -> np.ndarray:
+    """Apprentissage du réseau en lui présentant une ville aléatoire à chaque itération
 
     Parameters
     ----------
-    data : DataFrame
-        Dataframe stockant l'intégralité des coordonnées des villes à parcourir
-    iterations : int 
+    coordonnees : np.ndarray
+        coordonnées normalisées des villes
+    neurones : np.ndarray
+        réseau initial, modifié sur place
+    iterations : int
         nombre d'itérations maximal
     taux_apprentissage : float
-        taux d'apprentissage du réseau de kohonen
+        taux d'apprentissage initial du réseau
+    generateur : np.random.Generator
+        générateur aléatoire
 
     Returns
     -------
-    itineraire : list[int]
-        le chemin final trouvé
-    temps_calcul : float
-        temps necessaire à la résolution du problème
+    np.ndarray
+        réseau entrainé
     """
-    start_time = time.time()
-
-    # On crée des villes artificielles normalisées
-    villes = data.copy()
-    villes[['x', 'y']] = normalisation(villes[['x', 'y']])
-
-    # Hyperparamètre
-    # La taille de la population de neuronne est 8 fois celle du nombre de villes
-    n = villes.shape[0]*8
-    # Génération du réseau de neurones
-    neurones = creation_reseau(n)
-    # print('Réseau de {} neurones créé. On commence les itérations :'.format(n))
+    n = neurones.shape[0]
+    # La boucle ne manipule que des tableaux numpy : les coordonnées des villes et
+    # l'ordre dans lequel elles sont présentées au réseau sont tirés en une fois
+    villes_tirees = generateur.integers(len(coordonnees), size=iterations)
+    # Le rayon d'influence ne prend que des valeurs entières : la fenêtre de chacune est
+    # calculée à sa première utilisation
+    fenetres = {}
 
     for i in range(1, iterations):
         # On choisit une ville aléatoire. On retourne ses coordonnées
-        ville = villes.sample(1)[['x', 'y']].values
+        ville = coordonnees[villes_tirees[i]]
         index_gagnant = neurone_gagnant(neurones, ville)
-        # Génération d'un filtre gaussien modélisant l'attraction entre un le neurone gagnant et ses voisins
-        gaussian = voisinage(int(index_gagnant), n//10, neurones.shape[0])
+        # Filtre gaussien modélisant l'attraction entre un le neurone gagnant et ses voisins
+        rayon = n//10
+        if rayon not in fenetres:
+            fenetres[rayon] = fenetre_voisinage(rayon, neurones.shape[0])
+        decalages, gaussian = fenetres[rayon]
+        # Neurones de la fenêtre, le réseau formant un cycle
+        voisins = (index_gagnant + decalages) % neurones.shape[0]
         # Mise à jour des poids des neurones (proche de la ville initiale)
         # np.newaxis pour contrôler le broadcasting
-        neurones += gaussian[:, np.newaxis] * \
-            taux_apprentissage * (ville - neurones)
+        neurones[voisins] += gaussian[:, np.newaxis] * \
+            taux_apprentissage * (ville - neurones[voisins])
         # Mise à jour du taux d'apprentissage
         taux_apprentissage = taux_apprentissage * 0.99997
         # Réduction de la distance d'influence d'un neurone
@@ -156,13 +225,206 @@ def carte_auto_adaptatives(data: pd.DataFrame, iterations: int, taux_apprentissa
             #      "à l'itération {}".format(i))
             break
 
+    return neurones
+
+
+def accumulation_voisinage(valeurs: np.ndarray, rayon: float) -> np.ndarray:
+    """Somme pour chaque neurone des valeurs de ses voisins pondérées par la gaussienne
+    de `voisinage` (convolution circulaire le long du cycle de neurones)
+
+    Parameters
+    ----------
+    valeurs : np.ndarray
+        une ligne de valeurs par neurone
+    rayon : float
+        rayon d'influence (écart type de la gaussienne)
+
+    Returns
+    -------
+    np.ndarray
+        valeurs accumulées, de même forme que `valeurs`
+    """
+    nombre_neurones = valeurs.shape[0]
+    decalages, poids = fenetre_voisinage(rayon, nombre_neurones)
+    # Fenêtre étroite (qui ne couvre pas tout le cycle) : convolution directe
+    if len(decalages) <= LARGEUR_MAX_CONVOLUTION and len(decalages) < nombre_neurones:
+        return convolve1d(valeurs, poids, axis=0, mode='wrap')
+
+    # Gaussienne large : produit des transformées de Fourier, en O(n log n)
+    gaussienne = voisinage(0, rayon, nombre_neurones)
+    return np.fft.irfft(np.fft.rfft(valeurs, axis=0) * np.fft.rfft(gaussienne)[:, np.newaxis],
+                        n=nombre_neurones, axis=0)
+
+
+def apprentissage_lot(coordonnees: np.ndarray, neurones: np.ndarray, nombre_epoch: int, taille_lot: int, generateur: np.random.Generator, nombre_threads: int = -1) -> np.ndarray:
+    """Apprentissage du réseau par lots de villes (batch SOM)
+
+    A chaque étape les gagnants de toutes les villes du lot sont cherchés en une requête
+    sur un KD-tree des neurones, répartie entre plusieurs threads. Chaque neurone est
+    ensuite rapproché de la moyenne des villes gagnées par ses voisins, pondérée par la
+    gaussienne : sommes par neurone (`np.bincount`) puis convolution le long du cycle.
+    Le rayon d'influence décroît géométriquement jusqu'à un neurone à la dernière étape.
+
+    Parameters
+    ----------
+    coordonnees : np.ndarray
+        coordonnées normalisées des villes
+    neurones : np.ndarray
+        réseau initial, modifié sur place
+    nombre_epoch : int
+        nombre de passages sur toutes les villes
+    taille_lot : int
+        nombre de villes par lot, toutes les villes si None
+    generateur : np.random.Generator
+        générateur aléatoire, pour l'ordre des villes dans les petits lots
+    nombre_threads : int (optionnel)
+        nombre de threads de la recherche des gagnants, -1 pour utiliser tous les coeurs
+
+    Returns
+    -------
+    np.ndarray
+        réseau entrainé
+    """
+    nombre_villes = len(coordonnees)
+    nombre_neurones = neurones.shape[0]
+    if taille_lot is None or taille_lot >= nombre_villes:
+        taille_lot, taux_apprentissage = nombre_villes, 1.0
+    else:
+        taux_apprentissage = TAUX_APPRENTISSAGE_LOT
+    lots_par_epoch = -(-nombre_villes // taille_lot)
+
+    # Décroissance géométrique du rayon sur l'ensemble des étapes
+    nombre_etapes = nombre_epoch * lots_par_epoch
+    rayon_initial = max(nombre_neurones * RAYON_INITIAL_LOT, 1)
+    rayons = rayon_initial * \
+        (1 / rayon_initial) ** (np.arange(nombre_etapes) / max(nombre_etapes - 1, 1))
+
+    etape = 0
+    for _ in range(nombre_epoch):
+        ordre = generateur.permutation(nombre_villes) if lots_par_epoch > 1 \
+            else np.arange(nombre_villes)
+        for debut in range(0, nombre_villes, taille_lot):
+            lot = coordonnees[ordre[debut:debut + taille_lot]]
+            gagnants = plus_proche_point(
+                construction_index(neurones), lot, nombre_threads)
+
+            # Nombre et somme des villes gagnées par chaque neurone
+            sommes = np.empty((nombre_neurones, 3))
+            sommes[:, 0] = np.bincount(gagnants, minlength=nombre_neurones)
+            sommes[:, 1] = np.bincount(
+                gagnants, lot[:, 0], minlength=nombre_neurones)
+            sommes[:, 2] = np.bincount(
+                gagnants, lot[:, 1], minlength=nombre_neurones)
+            sommes = accumulation_voisinage(sommes, rayons[etape])
+            etape += 1
+
+            # Un neurone trop loin de toute ville gagnée ne bouge pas
+            attires = sommes[:, 0] > 1e-12
+            moyennes = sommes[attires, 1:] / sommes[attires, :1]
+            neurones[attires] += taux_apprentissage * \
+                (moyennes - neurones[attires])
+
+    return neurones
+
+
+def carte_auto_adaptatives(data: pd.DataFrame, iterations: int, taux_apprentissage=0.8, graine: int = None, mode: str = 'en_ligne', taille_lot: int = None, nombre_threads: int = -1) -> tuple[list[int], float, list[np.ndarray]]:
+    """Résolution du TSP en utilisant une Cartes auto-adaptatives
+
+    Parameters
+    ----------
+    data : DataFrame
+        Dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    iterations : int 
+        nombre d'itérations maximal, en mode lot nombre de passages sur toutes les villes
+    taux_apprentissage : float
+        taux d'apprentissage du réseau de kohonen en mode en ligne
+    graine : int (optionnel)
+        graine du générateur aléatoire, pour reproduire un apprentissage
+    mode : str (optionnel)
+        mode d'apprentissage parmi `MODES_APPRENTISSAGE`
+    taille_lot : int (optionnel)
+        nombre de villes par lot en mode lot, toutes les villes par défaut
+    nombre_threads : int (optionnel)
+        nombre de threads de la recherche des gagnants en mode lot, -1 pour tous les coeurs
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin final trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    # On crée des villes artificielles normalisées, le dataframe d'origine est conservé
+    villes = normalisation(data[['x', 'y']])
+
+    generateur = np.random.default_rng(graine)
+
+    # Hyperparamètre
+    # La taille de la population de neuronne est 8 fois celle du nombre de villes
+    n = villes.shape[0]*8
+    # Génération du réseau de neurones
+    neurones = creation_reseau(n, generateur)
+    # print('Réseau de {} neurones créé. On commence les itérations :'.format(n))
+
+    coordonnees = villes[['x', 'y']].to_numpy()
+    if mode == 'lot':
+        neurones = apprentissage_lot(
+            coordonnees, neurones, iterations, taille_lot, generateur, nombre_threads)
+    else:
+        neurones = apprentissage_en_ligne(
+            coordonnees, neurones, iterations, taux_apprentissage, generateur)
+
     itineraire = chemin_final(villes, neurones)
     temps_calcul = time.time() - start_time
 
     return itineraire, temps_calcul
 
 
-def main(data: pd.DataFrame, mat_distance: np.ndarray, nom_dataset="") -> tuple[pd.DataFrame, list[np.ndarray]]:
+# Le résultat dépend beaucoup du réseau initial : plusieurs apprentissages indépendants,
+# chacun avec sa graine, sont lancés en parallèle et le trajet le plus court est conservé
+
+# Nombre de processus par défaut pour les redémarrages : un par coeur
+NOMBRE_PROCESSUS = os.cpu_count() or 1
+
+
+def redemarrages(data: pd.DataFrame, iterations: int, graines: list[int], mode: str, taille_lot: int, nombre_processus: int) -> list[tuple[list[int], float]]:
+    """Apprentissages indépendants du réseau, répartis entre plusieurs processus
+
+    Parameters
+    ----------
+    data : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    iterations : int
+        nombre d'itérations de chaque apprentissage (cf. `carte_auto_adaptatives`)
+    graines : list[int]
+        graine de chaque apprentissage
+    mode : str
+        mode d'apprentissage parmi `MODES_APPRENTISSAGE`
+    taille_lot : int
+        nombre de villes par lot en mode lot
+    nombre_processus : int
+        nombre de processus
+
+    Returns
+    -------
+    list[tuple[list[int], float]]
+        trajet et temps de calcul de chaque apprentissage, dans l'ordre des graines
+    """
+    if nombre_processus <= 1 or len(graines) == 1:
+        return [carte_auto_adaptatives(data, iterations, graine=graine, mode=mode, taille_lot=taille_lot)
+                for graine in graines]
+
+    # Les processus se partagent déjà les coeurs : un seul thread chacun en mode lot
+    with ProcessPoolExecutor(max_workers=min(nombre_processus, len(graines))) as executeur:
+        futurs = [executeur.submit(carte_auto_adaptatives, data[['x', 'y']], iterations, graine=graine,
+                                   mode=mode, taille_lot=taille_lot, nombre_threads=1)
+                  for graine in graines]
+        return [futur.result() for futur in futurs]
+
+
+def main(data: pd.DataFrame, mat_distance: np.ndarray, nom_dataset="", graine: int = None, mode: str = 'en_ligne', taille_lot: int = None, nombre_redemarrages: int = 1, nombre_processus: int = NOMBRE_PROCESSUS) -> tuple[pd.DataFrame, list[np.ndarray]]:
     """Lancement de l'algorithme de kohonen
 
     Parameters
@@ -173,6 +435,17 @@ def main(data: pd.DataFrame, mat_distance: np.ndarray, nom_dataset="") -> tuple[
         matrice stockant l'integralité des distances inter villes
     nom_dataset : str (optionnel)
         nom du dataset à traiter
+    graine : int (optionnel)
+        graine du générateur aléatoire, pour reproduire un apprentissage
+    mode : str (optionnel)
+        mode d'apprentissage parmi `MODES_APPRENTISSAGE`. Le mode lot est conseillé
+        au-delà de quelques milliers de villes
+    taille_lot : int (optionnel)
+        nombre de villes par lot en mode lot, toutes les villes par défaut
+    nombre_redemarrages : int (optionnel)
+        nombre d'apprentissages indépendants, le trajet le plus court étant retenu
+    nombre_processus : int (optionnel)
+        nombre de processus se partageant les apprentissages
 
     Returns
     -------
@@ -180,12 +453,28 @@ def main(data: pd.DataFrame, mat_distance: np.ndarray, nom_dataset="") -> tuple[
         variable stockant un ensemble de variables importantes pour analyser
         l'algorithme
     """
+    assert mode in MODES_APPRENTISSAGE, print(
+        "Veuillez choisir un mode parmi : {}".format(MODES_APPRENTISSAGE))
+
+    # Une graine distincte par apprentissage, toutes déduites de `graine`
+    graines = [graine]
+    if nombre_redemarrages > 1:
+        graines = np.random.SeedSequence(graine).generate_state(
+            nombre_redemarrages).tolist()
+
     # Résolution du TSP
-    itineraire, temps_calcul = carte_auto_adaptatives(
-        data, EPOCH_MAX)
+    start_time = time.time()
+    iterations = EPOCH_LOT if mode == 'lot' else EPOCH_MAX
+    resultats = redemarrages(data, iterations, graines,
+                             mode, taille_lot, nombre_processus)
+    temps_calcul = time.time() - start_time
 
-    # Calcul de la distance du trajet final trouvé par l'algorithme
-    distance_chemin_sub_optimal = distance_trajet(itineraire, mat_distance)
+    # Calcul de la distance des trajets trouvés, on conserve le plus court
+    distances = [distance_trajet(itineraire, mat_distance)
+                 for itineraire, _ in resultats]
+    meilleur = int(np.argmin(distances))
+    itineraire = resultats[meilleur][0]
+    distance_chemin_sub_optimal = distances[meilleur]
 
     # Création du dataframe à retourner
     # On inclut pas l'évolution du réseau pour pas sucharger le fichier csv de résultats
@@ -196,7 +485,9 @@ def main(data: pd.DataFrame, mat_distance: np.ndarray, nom_dataset="") -> tuple[
         # Dans un tableau pour être sur une seule ligne du dataframe
         'Solution': [itineraire],
         'Distance': distance_chemin_sub_optimal,
-        'Temps de calcul (en s)': temps_calcul
+        'Temps de calcul (en s)': temps_calcul,
+        'Distances des redémarrages': [distances],
+        'Temps des redémarrages (en s)': [[temps for _, temps in resultats]]
     })
 
     return df_resultat_test
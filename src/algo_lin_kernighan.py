@@ -0,0 +1,380 @@
+import random
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.algo_2_opt import (EPSILON, deux_opt_voisins, tableau_en_itineraire,
+                            tolerance_gain)
+from src.algo_or_opt import LONGUEUR_OR_OPT, amelioration_segment
+from src.algo_proche_voisin import plus_proche_voisin
+from src.distance import distance_trajet
+from src.index_spatial import construction_index, voisins_candidats
+from src.tour import Tour, creation_tour
+
+# Recherche locale à profondeur variable inspirée de Lin-Kernighan. A partir d'une ville
+# t1, on enchaîne des mouvements 2-opt : chacun retire l'arête (t1, t2) restée "ouverte"
+# et la remplace par une arête (t2, t3) vers un voisin proche de t2. On conserve la
+# meilleure profondeur atteinte et on annule les mouvements suivants. La recherche est
+# complétée par l'Or-opt puis relancée après des perturbations "double pont" locales
+# (recherche locale itérée) jusqu'à épuisement du temps alloué.
+
+# Cf. https://en.wikipedia.org/wiki/Lin%E2%80%93Kernighan_heuristic
+
+# Nombre maximal de mouvements 2-opt enchaînés depuis une ville
+PROFONDEUR_MAX = 10
+
+# Nombre de voisins candidats par ville
+NOMBRE_VOISINS_LK = 8
+
+# Temps alloué à la recherche (en s)
+TEMPS_MAX = 5
+
+# Nombre de villes sur lesquelles s'étend une perturbation double pont
+LONGUEUR_PERTURBATION = 50
+
+
+def amelioration_lk(t1: int, tour: Tour, matrice_distance: np.ndarray, liste_voisins: list[list[int]], distances_voisins: list[list[float]], tolerance: float = 0.0) -> tuple[int, ...]:
+    """Recherche et application d'une suite de mouvements 2-opt améliorante depuis t1
+
+    Parameters
+    ----------
+    t1 : int
+        ville examinée
+    tour : Tour
+        cycle courant, modifié sur place (cf. `src.tour`)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, triés par distance croissante
+    distances_voisins : list[list[float]]
+        distances entre chaque ville et ses voisins candidats
+    tolerance : float (optionnel)
+        tolérance relative sur les gains (cf. `src.algo_2_opt.tolerance_gain`)
+
+    Returns
+    -------
+    tuple[int, ...]
+        les extrémités des arêtes modifiées, vide si aucune amélioration n'a été trouvée
+    """
+    for sens_initial in (1, -1):
+        t2 = tour.suivant(t1) if sens_initial == 1 else tour.precedent(t1)
+        # Somme des arêtes retirées moins celle des arêtes ajoutées, hors fermeture
+        gain_partiel = matrice_distance[t1, t2]
+        # Somme des arêtes retirées, à laquelle la tolérance est rapportée
+        longueur_retiree = gain_partiel
+        mouvements = []
+        ajoutees = set()
+        meilleur_gain, meilleur_nombre = EPSILON, 0
+
+        for _ in range(PROFONDEUR_MAX):
+            # L'orientation du cycle peut changer après chaque inversion
+            sens = 1 if tour.suivant(t1) == t2 else -1
+            meilleur_choix, meilleure_valeur = None, -np.inf
+            for t3, distance_23 in zip(liste_voisins[t2], distances_voisins[t2]):
+                gain_ouvert = gain_partiel - distance_23
+                if gain_ouvert <= EPSILON:
+                    break
+                t4 = tour.precedent(t3) if sens == 1 else tour.suivant(t3)
+                if t3 == t1 or t4 == t2 or (min(t3, t4), max(t3, t4)) in ajoutees:
+                    continue
+                # On privilégie la plus longue arête retirée
+                valeur = gain_ouvert + matrice_distance[t3, t4]
+                if valeur > meilleure_valeur:
+                    meilleur_choix, meilleure_valeur = (t3, t4), valeur
+
+            if meilleur_choix is None:
+                break
+            t3, t4 = meilleur_choix
+            tour.echange_2opt(t1, t2, t3, t4)
+            mouvements.append((t2, t3, t4))
+            ajoutees.add((min(t2, t3), max(t2, t3)))
+
+            gain_partiel = meilleure_valeur
+            longueur_retiree += matrice_distance[t3, t4]
+            # Gain effectif du chemin actuel, l'arête (t1, t4) refermant le cycle
+            gain_ferme = gain_partiel - matrice_distance[t4, t1]
+            if gain_ferme > meilleur_gain and gain_ferme > EPSILON + tolerance * longueur_retiree:
+                meilleur_gain, meilleur_nombre = gain_ferme, len(mouvements)
+            t2 = t4
+
+        # Annulation des mouvements au-delà de la meilleure profondeur
+        for t2, t3, t4 in reversed(mouvements[meilleur_nombre:]):
+            tour.echange_2opt(t1, t4, t3, t2)
+
+        if meilleur_nombre > 0:
+            return (t1,) + tuple(ville for mouvement in mouvements[:meilleur_nombre] for ville in mouvement)
+
+    return ()
+
+
+def gain_segment(tour: Tour, matrice_distance: np.ndarray, mouvement: tuple[int, ...]) -> float:
+    """Gain d'un déplacement de segment qui vient d'être appliqué au cycle
+
+    Parameters
+    ----------
+    tour : Tour
+        cycle courant, juste après le déplacement (cf. `src.tour`)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    mouvement : tuple[int, ...]
+        déplacement `(p, n, x, y, premiere, derniere)` : le segment allant de premiere
+        à derniere, retiré d'entre p et n, a été inséré entre x et y
+
+    Returns
+    -------
+    float
+        diminution de la longueur du cycle, négative si elle a augmenté
+    """
+    p, n, x, y, premiere, derniere = mouvement
+    # L'extrémité du segment voisine de x donne le sens d'insertion
+    if premiere in (tour.suivant(x), tour.precedent(x)):
+        ajout = matrice_distance[x, premiere] + matrice_distance[derniere, y]
+    else:
+        ajout = matrice_distance[x, derniere] + matrice_distance[premiere, y]
+    return matrice_distance[p, premiere] + matrice_distance[derniere, n] + \
+        matrice_distance[x, y] - matrice_distance[p, n] - ajout
+
+
+def annulation(tour: Tour, mouvements: list[tuple[int, ...]]) -> None:
+    """Annulation d'une suite de mouvements en rejouant leurs inverses du dernier au premier
+
+    Parameters
+    ----------
+    tour : Tour
+        cycle courant, modifié sur place (cf. `src.tour`)
+    mouvements : list[tuple[int, ...]]
+        mouvements 2-opt `(t1, t2, t3, t4)` (cf. `Tour.echange_2opt`) et déplacements
+        de segment `(p, n, x, y, premiere, derniere)` (cf. `gain_segment`)
+    """
+    for mouvement in reversed(mouvements):
+        if len(mouvement) == 4:
+            t1, t2, t3, t4 = mouvement
+            tour.echange_2opt(t1, t4, t3, t2)
+            continue
+
+        p, n, x, y, premiere, derniere = mouvement
+        # Le segment est entre x et y, parcouru dans un sens ou dans l'autre
+        debut = tour.suivant(x)
+        if debut not in (premiere, derniere):
+            debut = tour.suivant(y)
+        fin = derniere if debut == premiere else premiere
+        # Réinsertion entre p et n, premiere contre p
+        if tour.suivant(p) == n:
+            tour.deplacer_segment(debut, fin, p, debut != premiere)
+        else:
+            tour.deplacer_segment(debut, fin, n, debut != derniere)
+
+
+def recherche_locale(tour: Tour, matrice_distance: np.ndarray, liste_voisins: list[list[int]], distances_voisins: list[list[float]], villes: list[int], tolerance: float = 0.0, mouvements: list[tuple[int, ...]] = None) -> float:
+    """Recherche locale Lin-Kernighan et Or-opt avec bits "don't look"
+
+    Parameters
+    ----------
+    tour : Tour
+        cycle courant, modifié sur place (cf. `src.tour`)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, triés par distance croissante
+    distances_voisins : list[list[float]]
+        distances entre chaque ville et ses voisins candidats
+    villes : list[int]
+        villes à examiner en premier lieu
+    tolerance : float (optionnel)
+        tolérance relative sur les gains (cf. `src.algo_2_opt.tolerance_gain`)
+    mouvements : list[tuple[int, ...]] (optionnel)
+        si renseignée, les mouvements appliqués y sont ajoutés pour pouvoir être
+        annulés (cf. `annulation`)
+
+    Returns
+    -------
+    float
+        diminution de la longueur du cycle
+    """
+    file = deque(villes)
+    dans_file = np.zeros(tour.n, dtype=bool)
+    dans_file[villes] = True
+    gain_total = 0.0
+
+    while file:
+        t1 = file.popleft()
+        dans_file[t1] = False
+
+        villes_modifiees = amelioration_lk(
+            t1, tour, matrice_distance, liste_voisins, distances_voisins, tolerance)
+        if villes_modifiees:
+            # Suite de mouvements 2-opt (t1, t2, t3, t4), t2 reprenant le t4 précédent
+            for k in range(1, len(villes_modifiees), 3):
+                t2, t3, t4 = villes_modifiees[k:k+3]
+                gain_total += matrice_distance[t1, t2] + matrice_distance[t3, t4] - \
+                    matrice_distance[t2, t3] - matrice_distance[t1, t4]
+                if mouvements is not None:
+                    mouvements.append((t1, t2, t3, t4))
+        else:
+            villes_modifiees = amelioration_segment(
+                t1, tour, matrice_distance, liste_voisins, distances_voisins, LONGUEUR_OR_OPT, tolerance)
+            if villes_modifiees:
+                gain_total += gain_segment(tour,
+                                           matrice_distance, villes_modifiees)
+                if mouvements is not None:
+                    mouvements.append(villes_modifiees)
+
+        # Les extrémités des arêtes modifiées sont à réexaminer
+        for ville in villes_modifiees:
+            if not dans_file[ville]:
+                dans_file[ville] = True
+                file.append(ville)
+
+    return gain_total
+
+
+def double_pont(tour: Tour) -> tuple[int, ...]:
+    """Perturbation double pont locale : échange de deux segments consécutifs
+
+    Les segments sont tirés dans une fenêtre de `LONGUEUR_PERTURBATION` villes afin
+    que la recherche locale n'ait à réparer qu'une petite zone du chemin.
+
+    Parameters
+    ----------
+    tour : Tour
+        cycle courant, modifié sur place (cf. `src.tour`)
+
+    Returns
+    -------
+    tuple[int, ...]
+        le déplacement de segment appliqué `(p, n, x, y, premiere, derniere)`
+        (cf. `gain_segment`), dont les villes sont les extrémités des arêtes modifiées
+    """
+    longueur = min(LONGUEUR_PERTURBATION, tour.n - 1)
+    debut = random.randrange(tour.n)
+    # Deux coupures dans la fenêtre : [debut, coupure[ et [coupure, fin[
+    coupure, fin = sorted(random.sample(range(2, longueur + 1), 2))
+    coupure -= 1
+
+    # Villes de la fenêtre suivant la ville de début
+    fenetre = [tour.suivant(debut)]
+    for _ in range(fin):
+        fenetre.append(tour.suivant(fenetre[-1]))
+    # Le premier segment est replacé après le second
+    tour.deplacer_segment(fenetre[0], fenetre[coupure - 1], fenetre[fin - 1], False)
+    return debut, fenetre[coupure], fenetre[fin - 1], fenetre[fin], fenetre[0], fenetre[coupure - 1]
+
+
+def lin_kernighan(itineraire_initial: list[int], matrice_distance: np.ndarray, voisins: np.ndarray, temps_max: float = TEMPS_MAX, structure: str = 'tableau') -> tuple[list[int], float]:
+    """Recherche locale itérée Lin-Kernighan
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville, triés par distance croissante
+    temps_max : float (optionnel)
+        temps alloué à la recherche (en s)
+    structure : str (optionnel)
+        représentation du cycle parmi `src.tour.STRUCTURES`
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    # Cycle sans répétition de la ville de départ
+    tour = creation_tour(itineraire_initial[:-1], structure)
+    nombre_ville = tour.n
+
+    # Listes Python pour un accès rapide dans la boucle
+    liste_voisins = voisins.tolist()
+    distances_voisins = matrice_distance[np.arange(
+        nombre_ville)[:, np.newaxis], voisins].tolist()
+    tolerance = tolerance_gain(matrice_distance)
+
+    recherche_locale(tour, matrice_distance, liste_voisins,
+                     distances_voisins, tour.vers_tableau().tolist(), tolerance)
+    meilleur_chemin = tour.vers_tableau()
+    meilleur_distance = distance_trajet(
+        np.append(meilleur_chemin, meilleur_chemin[0]), matrice_distance)
+
+    # Une perturbation n'a de sens qu'avec assez de villes pour former deux segments.
+    # La longueur du cycle est suivie par les gains de la perturbation et des
+    # mouvements : une perturbation rejetée est annulée en rejouant les mouvements
+    # inverses et le cycle n'est copié que lorsqu'il améliore la meilleure solution
+    while nombre_ville >= 8 and time.time() - start_time < temps_max:
+        perturbation = double_pont(tour)
+        mouvements = [perturbation]
+        gain = gain_segment(tour, matrice_distance, perturbation)
+        gain += recherche_locale(tour, matrice_distance, liste_voisins,
+                                 distances_voisins, list(perturbation), tolerance, mouvements)
+
+        # En précision réduite, un gain inférieur à l'erreur d'arrondi de la longueur
+        # du cycle n'est pas significatif
+        if gain > EPSILON + tolerance * meilleur_distance:
+            meilleur_chemin = tour.vers_tableau()
+            meilleur_distance -= gain
+        else:
+            # Retour à la meilleure solution connue
+            annulation(tour, mouvements)
+
+    temps_calcul = time.time() - start_time
+    return tableau_en_itineraire(meilleur_chemin, itineraire_initial[0]), temps_calcul
+
+
+def main(data: pd.DataFrame, matrice_distance: np.ndarray, nom_dataset="", temps_max: float = TEMPS_MAX) -> pd.DataFrame:
+    """Lancement de l'algorithme de Lin-Kernighan
+
+    Le chemin initial est celui du plus proche voisin amélioré par le 2-opt.
+
+    Parameters
+    ----------
+    data : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    nom_dataset : str (optionnel)
+        nom du dataset à traiter
+    temps_max : float (optionnel)
+        temps alloué à la recherche (en s)
+
+    Returns
+    -------
+    df_resultat_test : Dataframe
+        variable stockant un ensemble de variables importantes pour analyser
+        l'algorithme
+    """
+    start_time = time.time()
+
+    # Chemin initial et voisins candidats
+    index = construction_index(data)
+    voisins = voisins_candidats(index, NOMBRE_VOISINS_LK)
+    chemin_initial, _ = plus_proche_voisin(matrice_distance, index)
+    chemin_initial, _ = deux_opt_voisins(
+        chemin_initial, matrice_distance, voisins)
+
+    # Résolution du TSP
+    itineraire, _ = lin_kernighan(
+        chemin_initial, matrice_distance, voisins, temps_max)
+    temps_calcul = time.time() - start_time
+
+    # Calcul de la distance du trajet final trouvé par l'algorithme
+    distance_chemin_sub_optimal = distance_trajet(itineraire, matrice_distance)
+
+    # Création du dataframe à retourner
+    df_resultat_test = pd.DataFrame({
+        'Algorithme': "lin_kernighan",
+        'Nom dataset': nom_dataset,
+        'Nombre de villes': len(itineraire)-1,
+        # Dans un tableau pour être sur une seule ligne du dataframe
+        'Solution': [itineraire],
+        'Distance': distance_chemin_sub_optimal,
+        'Temps de calcul (en s)': temps_calcul
+    })
+
+    return df_resultat_test
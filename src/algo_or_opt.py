@@ -0,0 +1,262 @@
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from src.algo_2_opt import (EPSILON, amelioration_voisins,
+                            tableau_en_itineraire, tolerance_gain)
+from src.distance import distance_trajet
+from src.tour import Tour, creation_tour
+
+# Recherche locale par déplacement de segments, à appliquer sur le chemin retourné par
+# le 2-opt. Un segment de quelques villes consécutives est retiré du chemin puis
+# réinséré, dans un sens ou dans l'autre, entre deux villes voisines ailleurs dans le
+# chemin. Ce mouvement est un cas particulier de 3-opt que le 2-opt ne sait pas faire.
+
+# Cf. https://en.wikipedia.org/wiki/3-opt
+
+# Longueur maximale des segments déplacés par l'Or-opt
+LONGUEUR_OR_OPT = 3
+
+# Longueur maximale des segments déplacés par le 3-opt restreint (Or-2opt)
+LONGUEUR_TROIS_OPT = 8
+
+
+def amelioration_segment(s: int, tour: Tour, matrice_distance: np.ndarray, liste_voisins: list[list[int]], distances_voisins: list[list[float]], longueur_max: int, tolerance: float = 0.0) -> tuple[int, ...]:
+    """Recherche et application d'un déplacement de segment améliorant depuis la ville s.
+
+    Les segments testés commencent ou finissent en s et comptent au plus `longueur_max`
+    villes. Le gain du retrait d'un segment entre p et n vaut
+    d(p, debut) + d(fin, n) - d(p, n) : on ne cherche à le réinsérer qu'à côté des
+    voisins candidats de ses extrémités plus proches que ce gain.
+
+    Parameters
+    ----------
+    s : int
+        ville examinée
+    tour : Tour
+        cycle courant, modifié sur place (cf. `src.tour`)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    liste_voisins : list[list[int]]
+        voisins candidats de chaque ville, triés par distance croissante
+    distances_voisins : list[list[float]]
+        distances entre chaque ville et ses voisins candidats
+    longueur_max : int
+        nombre maximal de villes du segment
+    tolerance : float (optionnel)
+        tolérance relative sur les gains (cf. `src.algo_2_opt.tolerance_gain`)
+
+    Returns
+    -------
+    tuple[int, ...]
+        les extrémités des arêtes modifiées, vide si aucun déplacement n'a été trouvé
+    """
+    # Extrémités des segments commençant en s et finissant en s, allongés d'une ville
+    # à chaque tour de boucle
+    fin_segment, debut_segment = s, s
+    for longueur in range(1, min(longueur_max, tour.n - 3) + 1):
+        if longueur > 1:
+            fin_segment = tour.suivant(fin_segment)
+            debut_segment = tour.precedent(debut_segment)
+        # Segment commençant en s puis segment finissant en s
+        for premiere, derniere in ((s, fin_segment), (debut_segment, s)):
+            p, n = tour.precedent(premiere), tour.suivant(derniere)
+            aretes_retirees = matrice_distance[p, premiere] + \
+                matrice_distance[derniere, n]
+            gain_retrait = aretes_retirees - matrice_distance[p, n]
+            if gain_retrait <= EPSILON:
+                continue
+
+            for extremite in (premiere, derniere):
+                for c, distance_c in zip(liste_voisins[extremite], distances_voisins[extremite]):
+                    if distance_c >= gain_retrait:
+                        break
+                    # Arêtes (x, y) adjacentes à c, hors du segment
+                    if tour.entre(premiere, c, derniere):
+                        continue
+                    for x, y in ((c, tour.suivant(c)), (tour.precedent(c), c)):
+                        if x == derniere or y == premiere:
+                            continue
+                        ajout_sens = matrice_distance[x, premiere] + \
+                            matrice_distance[derniere, y]
+                        ajout_inverse = matrice_distance[x, derniere] + \
+                            matrice_distance[premiere, y]
+                        distance_xy = matrice_distance[x, y]
+                        delta = gain_retrait + distance_xy - \
+                            min(ajout_sens, ajout_inverse)
+                        # Tolérance rapportée aux trois arêtes supprimées
+                        if delta > EPSILON + tolerance * (aretes_retirees + distance_xy):
+                            tour.deplacer_segment(
+                                premiere, derniere, x, ajout_inverse < ajout_sens)
+                            return p, n, x, y, premiere, derniere
+
+    return ()
+
+
+def recherche_segments(itineraire_initial: list[int], matrice_distance: np.ndarray, voisins: np.ndarray, longueur_max: int, avec_deux_opt: bool, structure: str = 'tableau', nombre_max_examens: int = None) -> tuple[list[int], float]:
+    """Recherche locale par déplacement de segments avec bits "don't look"
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville, triés par distance croissante
+    longueur_max : int
+        nombre maximal de villes des segments déplacés
+    avec_deux_opt : bool
+        si vrai, les inversions 2-opt sont aussi testées pour chaque ville
+    structure : str (optionnel)
+        représentation du cycle parmi `src.tour.STRUCTURES`
+    nombre_max_examens : int (optionnel)
+        nombre maximal de villes examinées, la recherche s'arrêtant alors avant
+        convergence. Par défaut la recherche continue jusqu'à un optimum local
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    # Cycle sans répétition de la ville de départ
+    tour = creation_tour(itineraire_initial[:-1], structure)
+    nombre_ville = tour.n
+
+    # Listes Python pour un accès rapide dans la boucle
+    liste_voisins = voisins.tolist()
+    distances_voisins = matrice_distance[np.arange(
+        nombre_ville)[:, np.newaxis], voisins].tolist()
+
+    # File des villes à examiner, une ville n'y est présente qu'une fois
+    file = deque(tour.vers_tableau().tolist())
+    dans_file = np.ones(nombre_ville, dtype=bool)
+    nombre_examens = 0
+    tolerance = tolerance_gain(matrice_distance)
+
+    while file and (nombre_max_examens is None or nombre_examens < nombre_max_examens):
+        s = file.popleft()
+        dans_file[s] = False
+        nombre_examens += 1
+
+        villes_modifiees = ()
+        if avec_deux_opt:
+            villes_modifiees = amelioration_voisins(
+                s, tour, matrice_distance, liste_voisins, distances_voisins, tolerance)
+        if not villes_modifiees:
+            villes_modifiees = amelioration_segment(
+                s, tour, matrice_distance, liste_voisins, distances_voisins, longueur_max, tolerance)
+
+        # Les extrémités des arêtes modifiées sont à réexaminer
+        for ville in villes_modifiees:
+            if not dans_file[ville]:
+                dans_file[ville] = True
+                file.append(ville)
+
+    temps_calcul = time.time() - start_time
+    return tableau_en_itineraire(tour.vers_tableau(), itineraire_initial[0]), temps_calcul
+
+
+def or_opt(itineraire_initial: list[int], matrice_distance: np.ndarray, voisins: np.ndarray, structure: str = 'tableau') -> tuple[list[int], float]:
+    """Or-opt : déplacement de segments de 1 à `LONGUEUR_OR_OPT` villes
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru, typiquement la sortie du 2-opt
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville (cf. `src.index_spatial`)
+    structure : str (optionnel)
+        représentation du cycle parmi `src.tour.STRUCTURES`
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    return recherche_segments(itineraire_initial, matrice_distance, voisins, LONGUEUR_OR_OPT, False, structure)
+
+
+def or_deux_opt(itineraire_initial: list[int], matrice_distance: np.ndarray, voisins: np.ndarray, structure: str = 'tableau') -> tuple[list[int], float]:
+    """3-opt restreint (Or-2opt) : inversions 2-opt et déplacements de segments de 1 à
+    `LONGUEUR_TROIS_OPT` villes dans un même voisinage
+
+    Parameters
+    ----------
+    itineraire_initial : list[int]
+        suite de villes donnant le chemin parcouru, typiquement la sortie du 2-opt
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville (cf. `src.index_spatial`)
+    structure : str (optionnel)
+        représentation du cycle parmi `src.tour.STRUCTURES`
+
+    Returns
+    -------
+    itineraire : list[int]
+        le chemin finalement trouvé
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    return recherche_segments(itineraire_initial, matrice_distance, voisins, LONGUEUR_TROIS_OPT, True, structure)
+
+
+def main(matrice_distance: np.ndarray, chemin_initial: list, voisins: np.ndarray, nom_dataset="", methode: str = 'or-opt', structure: str = 'tableau') -> pd.DataFrame:
+    """Lancement de la recherche locale par déplacement de segments
+
+    Parameters
+    ----------
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    chemin_initial : list
+        chemin à améliorer, typiquement la sortie du 2-opt
+    voisins : np.ndarray
+        listes des voisins candidats de chaque ville
+    nom_dataset : str (optionnel)
+        nom du dataset à traiter
+    methode : str (optionnel)
+        `or-opt` ou `or-2opt`
+    structure : str (optionnel)
+        représentation du cycle parmi `src.tour.STRUCTURES`
+
+    Returns
+    -------
+    df_resultat_test : Dataframe
+        variable stockant un ensemble de variables importantes pour analyser
+        l'algorithme
+    """
+    # Résolution du TSP
+    if methode == 'or-opt':
+        itineraire, temps_calcul = or_opt(
+            chemin_initial, matrice_distance, voisins, structure)
+    else:
+        itineraire, temps_calcul = or_deux_opt(
+            chemin_initial, matrice_distance, voisins, structure)
+
+    # Calcul de la distance du trajet final trouvé par l'algorithme
+    distance_chemin_sub_optimal = distance_trajet(itineraire, matrice_distance)
+
+    # Création du dataframe à retourner
+    df_resultat_test = pd.DataFrame({
+        'Algorithme': methode,
+        'Nom dataset': nom_dataset,
+        'Nombre de villes': len(chemin_initial)-1,
+        # Dans un tableau pour être sur une seule ligne du dataframe
+        'Solution': [itineraire],
+        # Distance du trajet final
+        'Distance': distance_chemin_sub_optimal,
+        'Temps de calcul (en s)': temps_calcul
+    })
+
+    return df_resultat_test
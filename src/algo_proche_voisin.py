@@ -3,7 +3,10 @@ import time
 import numpy as np
 import pandas as pd
 
-from src.distance import distance_trajet
+from scipy.spatial import cKDTree
+
+from src.distance import distance_trajet, distances_trajets
+from src.index_spatial import NOMBRE_VOISINS
 
 # Implémentation de l'algorithme du 1-plus proche voisin adapté à la résolution
 # du TSP. C'est un algorithme simple afin d'obtenir très rapidement une solution
@@ -11,8 +14,11 @@ from src.distance import distance_trajet
 
 # Cf. : https://fr.wikipedia.org/wiki/Recherche_des_plus_proches_voisins
 
+# Nombre de villes de départ du plus proche voisin multi-départs
+NOMBRE_DEPARTS = 10
+
 
-def plus_proche_voisin(matrice_distance: np.ndarray) -> tuple[list[int], float, list[list[int]]]:
+def plus_proche_voisin(matrice_distance: np.ndarray, index: cKDTree = None) -> tuple[list[int], float, list[list[int]]]:
     """Retourne le trajet trouvé en se déplacement de proche en proche.
 
     La ville de départ étant arbitraire on choisit la ville d'index 0
@@ -21,6 +27,9 @@ def plus_proche_voisin(matrice_distance: np.ndarray) -> tuple[list[int], float,
     ----------
     matrice_distance : np.array
         matrice stockant l'integralité des distances inter villes
+    index : cKDTree (optionnel)
+        index spatial des villes. S'il est fourni, la ville la plus proche est cherchée
+        parmi les voisins donnés par l'index plutôt que dans toute une ligne de la matrice
 
     Returns
     -------
@@ -32,25 +41,29 @@ def plus_proche_voisin(matrice_distance: np.ndarray) -> tuple[list[int], float,
     start_time = time.time()
 
     # Initialiation d'une matrice booléenne d'état de visite des villes
-    visite = np.zeros(len(matrice_distance)) != 0
+    nombre_ville = len(matrice_distance)
+    visite = np.zeros(nombre_ville, dtype=bool)
 
     # Initialisation de l'itinéraire
     itineraire = [0]
     visite[0] = True
 
-    while False in visite:
+    for _ in range(nombre_ville - 1):
         # A chaque itération on cherche la ville la plus proche de la ville actuelle
         # la ville actuelle étant la dernière de l'itinéraire
-
-        # Pour ne pas modifier les valeurs de matrice_distance
-        distance_a_ville = np.copy(matrice_distance[itineraire[-1], :])
-
-        for index in range(len(distance_a_ville)):
-            if visite[index]:
-                distance_a_ville[index] = np.Inf
-
-        # Récupération de l'index de la ville la plus proche
-        plus_proche = np.argmin(distance_a_ville)
+        if index is not None:
+            plus_proche = ville_proche_non_visitee(
+                index, itineraire[-1], visite)
+        else:
+            # Pour ne pas modifier les valeurs de matrice_distance. La copie est en
+            # float64 quel que soit le mode de stockage de la matrice (int32 compris)
+            distance_a_ville = np.array(
+                matrice_distance[itineraire[-1], :], dtype=np.float64)
+            # Les villes visitées sont écartées d'un seul coup grâce au masque
+            distance_a_ville[visite] = np.inf
+
+            # Récupération de l'index de la ville la plus proche
+            plus_proche = np.argmin(distance_a_ville)
 
         # On donne l'état visité à la ville la plus proche
         visite[plus_proche] = True
@@ -64,6 +77,93 @@ def plus_proche_voisin(matrice_distance: np.ndarray) -> tuple[list[int], float,
     return itineraire, temps_calcul
 
 
+def ville_proche_non_visitee(index: cKDTree, ville: int, visite: np.ndarray) -> int:
+    """Recherche de la ville non visitée la plus proche à l'aide de l'index spatial
+
+    On interroge les k plus proches voisins de la ville, en doublant k tant
+    qu'ils ont tous déjà été visités.
+
+    Parameters
+    ----------
+    index : cKDTree
+        index spatial des villes
+    ville : int
+        ville actuelle
+    visite : np.ndarray
+        état de visite des villes
+
+    Returns
+    -------
+    int
+        la ville non visitée la plus proche
+    """
+    k = min(NOMBRE_VOISINS, index.n)
+    while True:
+        _, candidats = index.query(index.data[ville], k=k)
+        candidats = np.atleast_1d(candidats)
+        candidats = candidats[~visite[candidats]]
+        if len(candidats) > 0:
+            return int(candidats[0])
+        k = min(2*k, index.n)
+
+
+def plus_proche_voisin_multiple(matrice_distance: np.ndarray, nombre_departs: int = NOMBRE_DEPARTS) -> tuple[list[int], float]:
+    """Plus proche voisin lancé depuis plusieurs villes de départ, on garde le meilleur trajet.
+
+    Les trajets sont construits simultanément : à chaque étape on lit en une fois les
+    lignes de la matrice des villes courantes de tous les trajets, puis un unique
+    `argmin` par ligne donne la ville suivante de chacun.
+
+    Parameters
+    ----------
+    matrice_distance : np.array
+        matrice stockant l'integralité des distances inter villes
+    nombre_departs : int (optionnel)
+        nombre de villes de départ, réparties uniformément parmi les index des villes
+
+    Returns
+    -------
+    itineraire : list[int]
+        le meilleur chemin trouvé, il commence et finit par la ville 0
+    temps_calcul : float
+        temps necessaire à la résolution du problème
+    """
+    start_time = time.time()
+
+    nombre_ville = len(matrice_distance)
+    departs = np.unique(np.linspace(
+        0, nombre_ville - 1, min(nombre_departs, nombre_ville), dtype=np.intp))
+    trajets = np.arange(len(departs))
+
+    # Une ligne par trajet : villes parcourues et état de visite des villes
+    itineraires = np.empty((len(departs), nombre_ville + 1), dtype=np.intp)
+    itineraires[:, 0] = departs
+    visite = np.zeros((len(departs), nombre_ville), dtype=bool)
+    visite[trajets, departs] = True
+
+    for etape in range(1, nombre_ville):
+        # Distances depuis la ville actuelle de chaque trajet, en float64 quel que soit
+        # le mode de stockage de la matrice
+        distances = np.array(
+            matrice_distance[itineraires[:, etape-1], :], dtype=np.float64)
+        distances[visite] = np.inf
+        plus_proches = np.argmin(distances, axis=1)
+        itineraires[:, etape] = plus_proches
+        visite[trajets, plus_proches] = True
+
+    # On pense à fermer les cycles puis on garde le plus court
+    itineraires[:, -1] = itineraires[:, 0]
+    meilleur = itineraires[np.argmin(
+        distances_trajets(itineraires, matrice_distance)), :-1]
+
+    # Le trajet commence par la ville 0 comme pour `plus_proche_voisin`
+    meilleur = np.roll(meilleur, -int(np.flatnonzero(meilleur == 0)[0]))
+    itineraire = meilleur.tolist() + [0]
+
+    temps_calcul = time.time() - start_time
+    return itineraire, temps_calcul
+
+
 def main(matrice_distance: np.ndarray, nom_dataset="") -> tuple[pd.DataFrame, list[list[int]]]:
     """Lancement de l'algorithme de recherche 
 
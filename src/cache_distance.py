@@ -0,0 +1,233 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.distance import MatriceCondensee, OracleDistance, matrice_distance
+
+# Les matrices des distances des jeux de données sont sauvegardées sur disque au format
+# .npy puis rouvertes en mémoire partagée (memory-map, lecture seule). Les lancements
+# successifs et les processus parallèles partagent ainsi une unique copie de la matrice
+# sans la recalculer.
+
+# Dossier de stockage des matrices
+DOSSIER_CACHE = "cache/matrices/"
+
+# Taille maximale occupée par le cache sur le disque (en octets)
+TAILLE_MAX_CACHE = 2 * 1024**3
+
+
+def cle_cache(villes: pd.DataFrame, mode: str) -> str:
+    """Clé d'une matrice dans le cache : empreinte des coordonnées et du mode de stockage
+
+    Parameters
+    ----------
+    villes : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    mode : str
+        mode de stockage de la matrice
+
+    Returns
+    -------
+    str
+        nom du fichier de la matrice dans le cache, sans extension
+    """
+    coordonnees = np.ascontiguousarray(
+        villes[['x', 'y']].to_numpy(dtype=np.float64))
+    empreinte = hashlib.sha1(coordonnees.tobytes())
+    empreinte.update(mode.encode())
+    return f"{empreinte.hexdigest()}_{mode}"
+
+
+def ouverture_matrice(chemin: str) -> np.ndarray | MatriceCondensee:
+    """Ouverture en lecture seule et sans copie d'une matrice du cache
+
+    Parameters
+    ----------
+    chemin : str
+        chemin du fichier .npy
+
+    Returns
+    -------
+    np.ndarray | MatriceCondensee
+        matrice stockant l'integralité des distances inter villes
+    """
+    tableau = np.load(chemin, mmap_mode='r')
+    if tableau.ndim == 1:
+        # Matrice condensée : n(n-1)/2 distances
+        n = int(round((1 + np.sqrt(1 + 8*len(tableau))) / 2))
+        return MatriceCondensee(tableau, n)
+    return tableau
+
+
+def eviction(dossier: str, taille_max: int, chemin_conserve: str = "") -> None:
+    """Suppression des matrices utilisées le moins récemment tant que le cache est trop gros
+
+    Parameters
+    ----------
+    dossier : str
+        dossier du cache
+    taille_max : int
+        taille maximale du cache (en octets)
+    chemin_conserve : str (optionnel)
+        fichier à ne jamais supprimer (la matrice qui vient d'être ajoutée)
+    """
+    fichiers = [os.path.join(dossier, f)
+                for f in os.listdir(dossier) if f.endswith('.npy')]
+    # Du moins récemment utilisé au plus récemment utilisé
+    fichiers.sort(key=os.path.getmtime)
+    taille = sum(os.path.getsize(f) for f in fichiers)
+
+    for fichier in fichiers:
+        if taille <= taille_max:
+            break
+        if fichier == chemin_conserve:
+            continue
+        taille -= os.path.getsize(fichier)
+        os.remove(fichier)
+
+
+def ecriture_atomique(chemin: str, tableau: np.ndarray) -> None:
+    """Ecriture d'un tableau au format .npy
+
+    Ecriture dans un fichier temporaire puis renommage atomique : plusieurs processus
+    peuvent remplir le cache en même temps sans lire de fichier incomplet
+
+    Parameters
+    ----------
+    chemin : str
+        chemin du fichier .npy
+    tableau : np.ndarray
+        tableau à écrire
+    """
+    descripteur, temporaire = tempfile.mkstemp(
+        dir=os.path.dirname(chemin), suffix='.tmp')
+    with os.fdopen(descripteur, 'wb') as f:
+        np.save(f, tableau)
+    os.replace(temporaire, chemin)
+
+
+def chemin_matrice_cache(villes: pd.DataFrame, mode: str = 'float64', dossier: str = DOSSIER_CACHE, taille_max: int = TAILLE_MAX_CACHE) -> str:
+    """Chemin de la matrice des distances dans le cache, calculée si elle n'y est pas
+
+    Parameters
+    ----------
+    villes : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    mode : str (optionnel)
+        mode de stockage de la matrice (cf. `src.distance.MODES_MATRICE`)
+    dossier : str (optionnel)
+        dossier du cache
+    taille_max : int (optionnel)
+        taille maximale du cache (en octets)
+
+    Returns
+    -------
+    str
+        chemin du fichier .npy
+    """
+    chemin = os.path.join(dossier, cle_cache(villes, mode) + '.npy')
+
+    if os.path.exists(chemin):
+        # Mise à jour de la date d'utilisation pour l'éviction
+        os.utime(chemin)
+        return chemin
+
+    os.makedirs(dossier, exist_ok=True)
+    mat_distance = matrice_distance(villes, mode)
+    if isinstance(mat_distance, MatriceCondensee):
+        mat_distance = mat_distance.condensee
+
+    ecriture_atomique(chemin, mat_distance)
+
+    eviction(dossier, taille_max, chemin)
+    return chemin
+
+
+def matrice_distance_cache(villes: pd.DataFrame, mode: str = 'float64', dossier: str = DOSSIER_CACHE, taille_max: int = TAILLE_MAX_CACHE) -> np.ndarray | MatriceCondensee:
+    """Matrice des distances lue depuis le cache disque, calculée au premier appel
+
+    La matrice retournée est en lecture seule et projetée en mémoire (memory-map).
+
+    Parameters
+    ----------
+    villes : DataFrame
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    mode : str (optionnel)
+        mode de stockage de la matrice (cf. `src.distance.MODES_MATRICE`)
+    dossier : str (optionnel)
+        dossier du cache
+    taille_max : int (optionnel)
+        taille maximale du cache (en octets)
+
+    Returns
+    -------
+    np.ndarray | MatriceCondensee
+        matrice stockant l'integralité des distances inter villes
+    """
+    # Rien à mettre en cache : l'oracle calcule les distances à la demande
+    if mode == 'oracle':
+        return matrice_distance(villes, mode)
+    return ouverture_matrice(chemin_matrice_cache(villes, mode, dossier, taille_max))
+
+
+def source_partagee(matrice_distance: np.ndarray | MatriceCondensee | OracleDistance, dossier: str = DOSSIER_CACHE, taille_max: int = TAILLE_MAX_CACHE) -> str | OracleDistance:
+    """Moyen de transmettre une matrice des distances à d'autres processus sans la copier
+
+    Une matrice déjà ouverte depuis le cache est désignée par son fichier. Une matrice en
+    mémoire est d'abord écrite dans le cache sous l'empreinte de son contenu. Chaque
+    processus l'ouvre ensuite avec `ouverture_partagee`, en lecture seule et projetée en
+    mémoire : le système ne garde qu'une copie pour tous. L'oracle, qui ne contient que
+    les coordonnées, est transmis directement.
+
+    Parameters
+    ----------
+    matrice_distance : np.ndarray | MatriceCondensee | OracleDistance
+        matrice stockant l'integralité des distances inter villes
+    dossier : str (optionnel)
+        dossier du cache
+    taille_max : int (optionnel)
+        taille maximale du cache (en octets)
+
+    Returns
+    -------
+    str | OracleDistance
+        chemin du fichier .npy, ou l'oracle lui-même
+    """
+    if isinstance(matrice_distance, OracleDistance):
+        return matrice_distance
+
+    tableau = matrice_distance.condensee if isinstance(
+        matrice_distance, MatriceCondensee) else matrice_distance
+    if isinstance(tableau, np.memmap) and tableau.filename is not None:
+        return tableau.filename
+
+    tableau = np.ascontiguousarray(tableau)
+    empreinte = hashlib.sha1(tableau.tobytes())
+    empreinte.update(str(tableau.dtype).encode())
+    chemin = os.path.join(dossier, f"{empreinte.hexdigest()}_partage.npy")
+    if not os.path.exists(chemin):
+        os.makedirs(dossier, exist_ok=True)
+        ecriture_atomique(chemin, tableau)
+        eviction(dossier, taille_max, chemin)
+    return chemin
+
+
+def ouverture_partagee(source: str | OracleDistance) -> np.ndarray | MatriceCondensee | OracleDistance:
+    """Ouverture dans un processus d'une matrice transmise par `source_partagee`
+
+    Parameters
+    ----------
+    source : str | OracleDistance
+        chemin du fichier .npy, ou l'oracle
+
+    Returns
+    -------
+    np.ndarray | MatriceCondensee | OracleDistance
+        matrice stockant l'integralité des distances inter villes
+    """
+    if isinstance(source, str):
+        return ouverture_matrice(source)
+    return source
@@ -1,3 +1,6 @@
+import math
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
 from scipy.spatial import distance
@@ -22,7 +25,226 @@ def distance_euclidienne(a: np.ndarray, b: np.ndarray) -> np.ndarray:
     return np.linalg.norm(a - b, axis=1)
 
 
-def matrice_distance(villes: pd.DataFrame) -> np.ndarray:
+# Modes de stockage de la matrice des distances
+# - float64 : matrice pleine en double précision
+# - float32 : matrice pleine en simple précision, deux fois plus légère
+# - condensee : triangle supérieur seul (format `pdist`), diagonale exclue
+# - tsplib : distances arrondies à l'entier le plus proche (`nint` TSPLIB) en int32
+# - oracle : aucune matrice, les distances sont calculées à la demande
+MODES_MATRICE = ['float64', 'float32', 'condensee', 'tsplib', 'oracle']
+
+# Une matrice entière ne peut pas stocker np.inf, on utilise la plus grande valeur
+# représentable afin que la diagonale ne soit jamais choisie
+DIAGONALE_ENTIERE = np.iinfo(np.int32).max
+
+# Nombre de lignes calculées à la fois pour les matrices float32 et tsplib
+TAILLE_BLOC = 256
+
+# Nombre de lignes de distances conservées par l'oracle
+TAILLE_CACHE_ORACLE = 256
+
+
+def index_condense(i: np.ndarray, j: np.ndarray, n: int) -> np.ndarray:
+    """Position de la distance entre les villes i et j dans une matrice condensée.
+
+    La matrice condensée stocke ligne par ligne le triangle supérieur strict de la
+    matrice des distances, comme le fait `scipy.spatial.distance.pdist`.
+
+    Parameters
+    ----------
+    i : np.ndarray
+        index des premières villes, on doit avoir i < j
+    j : np.ndarray
+        index des secondes villes
+    n : int
+        nombre de villes
+
+    Returns
+    -------
+    np.ndarray
+        index des distances dans le vecteur condensé
+    """
+    i = np.asarray(i, dtype=np.int64)
+    j = np.asarray(j, dtype=np.int64)
+    return n*i - i*(i+1)//2 + j - i - 1
+
+
+def _indices(cle, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Conversion d'une clé d'indexation `m[i, j]` en deux tableaux d'index broadcastables
+
+    Reproduit le comportement de numpy pour les clés utilisées par les algorithmes :
+    entiers, tableaux d'index et tranches `:`.
+
+    Parameters
+    ----------
+    cle : int | slice | np.ndarray | tuple
+        clé passée à `__getitem__`
+    n : int
+        nombre de villes
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        index des lignes et index des colonnes
+    """
+    if not isinstance(cle, tuple):
+        cle = (cle, slice(None))
+    i, j = cle
+    tranche_i, tranche_j = isinstance(i, slice), isinstance(j, slice)
+    i = np.arange(n)[i] if tranche_i else np.asarray(i)
+    j = np.arange(n)[j] if tranche_j else np.asarray(j)
+    if tranche_i:
+        # m[:, j] : une ligne de résultat par ville
+        i = i.reshape(i.shape + (1,) * j.ndim)
+    elif tranche_j:
+        # m[i, :] : la ligne complète de chaque ville de i
+        i = i[..., np.newaxis]
+    return i, j
+
+
+class MatriceCondensee:
+    """Matrice des distances ne stockant que le triangle supérieur strict.
+
+    S'indexe comme une matrice pleine (`m[i, j]`, `m[i, :]`, `m[liste_i, liste_j]`)
+    afin d'être utilisée directement par les algorithmes. La diagonale vaut np.inf.
+
+    Parameters
+    ----------
+    condensee : np.ndarray
+        vecteur des n(n-1)/2 distances retourné par `pdist`
+    n : int
+        nombre de villes
+    """
+
+    def __init__(self, condensee: np.ndarray, n: int):
+        self.condensee = condensee
+        self.n = n
+        self.shape = (n, n)
+        self.dtype = condensee.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.condensee.nbytes
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, cle) -> np.ndarray:
+        i, j = np.broadcast_arrays(*_indices(cle, self.n))
+        a, b = np.minimum(i, j), np.maximum(i, j)
+        diagonale = a == b
+        valeurs = self.condensee[np.where(
+            diagonale, 0, index_condense(a, b, self.n))]
+        # On remplace les distances de la diagonale
+        return np.where(diagonale, np.inf, valeurs)[()]
+
+
+class OracleDistance:
+    """Distances inter villes calculées à la demande depuis les coordonnées.
+
+    Aucune matrice n x n n'est allouée : la mémoire utilisée croît avec n. S'indexe
+    comme une matrice pleine (`m[i, j]`, `m[i, :]`, `m[liste_i, liste_j]`) afin
+    d'être utilisée directement par les algorithmes. La diagonale vaut np.inf.
+
+    Les dernières lignes demandées sont conservées dans un cache LRU borné.
+
+    Parameters
+    ----------
+    coordonnees : np.ndarray
+        coordonnées 2D des villes
+    taille_cache : int (optionnel)
+        nombre maximal de lignes conservées en cache
+    """
+
+    def __init__(self, coordonnees: np.ndarray, taille_cache: int = TAILLE_CACHE_ORACLE):
+        self.coordonnees = np.ascontiguousarray(coordonnees, dtype=np.float64)
+        self.n = len(self.coordonnees)
+        self.shape = (self.n, self.n)
+        self.dtype = self.coordonnees.dtype
+        self.taille_cache = taille_cache
+        self._cache = OrderedDict()
+        # Coordonnées en listes Python pour les requêtes d'une seule distance
+        self._x, self._y = self.coordonnees.T.tolist()
+
+    @property
+    def nbytes(self) -> int:
+        return self.coordonnees.nbytes + len(self._cache) * self.n * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return self.n
+
+    def ligne(self, i: int) -> np.ndarray:
+        """Distances entre la ville i et toutes les autres villes
+
+        Parameters
+        ----------
+        i : int
+            index de la ville
+
+        Returns
+        -------
+        np.ndarray
+            vecteur des distances, en lecture seule car partagé par le cache
+        """
+        i = int(i)
+        if i in self._cache:
+            self._cache.move_to_end(i)
+            return self._cache[i]
+
+        distances = self.bloc([i])[0]
+        distances.flags.writeable = False
+        self._cache[i] = distances
+        # On oublie la ligne utilisée le moins récemment
+        if len(self._cache) > self.taille_cache:
+            self._cache.popitem(last=False)
+        return distances
+
+    def bloc(self, lignes: np.ndarray, colonnes: np.ndarray = None) -> np.ndarray:
+        """Sous-matrice des distances entre deux ensembles de villes
+
+        Parameters
+        ----------
+        lignes : np.ndarray
+            index des villes en ligne
+        colonnes : np.ndarray (optionnel)
+            index des villes en colonne, toutes les villes par défaut
+
+        Returns
+        -------
+        np.ndarray
+            matrice de taille len(lignes) x len(colonnes)
+        """
+        lignes = np.asarray(lignes)
+        colonnes = np.arange(
+            self.n) if colonnes is None else np.asarray(colonnes)
+        distances = distance.cdist(
+            self.coordonnees[lignes], self.coordonnees[colonnes], 'euclidean')
+        # On remplace les distances de la diagonale
+        distances[lignes[:, np.newaxis] == colonnes] = np.inf
+        return distances
+
+    def __getitem__(self, cle) -> np.ndarray:
+        if not isinstance(cle, tuple):
+            cle = (cle, slice(None))
+        i, j = cle
+        # Distance entre deux villes : m[i, j]
+        if isinstance(i, (int, np.integer)) and isinstance(j, (int, np.integer)):
+            if i == j:
+                return np.inf
+            return math.hypot(self._x[i] - self._x[j], self._y[i] - self._y[j])
+        # Lignes complètes : m[i, :] ou m[liste_i, :]
+        if not isinstance(i, slice) and isinstance(j, slice) and j == slice(None):
+            if np.ndim(i) == 0:
+                return self.ligne(i)
+            return self.bloc(np.ravel(i)).reshape(np.shape(i) + (self.n,))
+
+        i, j = np.broadcast_arrays(*_indices(cle, self.n))
+        distances = np.linalg.norm(
+            self.coordonnees[i] - self.coordonnees[j], axis=-1)
+        return np.where(i == j, np.inf, distances)[()]
+
+
+def matrice_distance(villes: pd.DataFrame, mode: str = 'float64') -> np.ndarray:
     """
     Retourne une matrice stockant les distances inter villes. Cette matrice renseigne
     sur la distance entre la ville X et la ville Y à la position (X,Y).
@@ -31,23 +253,216 @@ def matrice_distance(villes: pd.DataFrame) -> np.ndarray:
     ----------
     villes : DataFrame
         dataframe stockant l'intégralité des coordonnées des villes à parcourir
+    mode : str (optionnel)
+        mode de stockage de la matrice parmi `MODES_MATRICE`
+
+    Returns
+    -------
+    np.ndarray | MatriceCondensee | OracleDistance
+        matrice stockant l'integralité des distances inter villes
+    """
+    assert mode in MODES_MATRICE, print(
+        "Veuillez choisir un mode parmi : {}".format(MODES_MATRICE))
+
+    coordonnees = villes[['x', 'y']].to_numpy(dtype=np.float64)
+    n = len(coordonnees)
+
+    if mode == 'oracle':
+        return OracleDistance(coordonnees)
+
+    if mode == 'condensee':
+        return MatriceCondensee(distance.pdist(coordonnees, 'euclidean'), n)
+
+    if mode == 'float64':
+        dist_matrice = distance.cdist(coordonnees, coordonnees, 'euclidean')
+    else:
+        # Calcul par blocs de lignes pour ne jamais allouer de matrice float64 complète
+        dtype = np.float32 if mode == 'float32' else np.int32
+        dist_matrice = np.empty((n, n), dtype=dtype)
+        for debut in range(0, n, TAILLE_BLOC):
+            bloc = distance.cdist(
+                coordonnees[debut:debut+TAILLE_BLOC], coordonnees, 'euclidean')
+            if mode == 'tsplib':
+                # nint(x) = (int) (x + 0.5) d'après la documentation TSPLIB
+                bloc += 0.5
+                np.floor(bloc, out=bloc)
+            dist_matrice[debut:debut+TAILLE_BLOC] = bloc
+
+    # On remplace les zéros des diagonales, sans copie de la matrice
+    np.fill_diagonal(dist_matrice, DIAGONALE_ENTIERE if mode ==
+                     'tsplib' else np.inf)
+    return dist_matrice
+
+
+# Fonctions de distance des instances TSPLIB définies par leurs coordonnées. Les
+# distances sont entières, arrondies selon la documentation TSPLIB
+# - EUC_2D : distance euclidienne arrondie à l'entier le plus proche
+# - CEIL_2D : distance euclidienne arrondie à l'entier supérieur
+# - ATT : pseudo-distance euclidienne des instances att48 et att532
+# - GEO : distance sur le globe terrestre, coordonnées en degrés.minutes
+# Cf. http://comopt.ifi.uni-heidelberg.de/software/TSPLIB95/tsp95.pdf
+TYPES_DISTANCE_TSPLIB = ['EUC_2D', 'CEIL_2D', 'ATT', 'GEO']
+
+# Rayon terrestre (en km) et valeur de pi imposés par la documentation TSPLIB
+RAYON_TERRE_TSPLIB = 6378.388
+PI_TSPLIB = 3.141592
+
+
+def radians_geo(coordonnees: np.ndarray) -> np.ndarray:
+    """Conversion en radians de coordonnées GEO au format DDD.MM (degrés.minutes)
+
+    Parameters
+    ----------
+    coordonnees : np.ndarray
+        latitudes et longitudes des villes
+
+    Returns
+    -------
+    np.ndarray
+        latitudes et longitudes en radians
+    """
+    degres = np.trunc(coordonnees)
+    minutes = coordonnees - degres
+    return PI_TSPLIB * (degres + 5.0 * minutes / 3.0) / 180.0
+
+
+def distances_tsplib(a: np.ndarray, b: np.ndarray, type_distance: str) -> np.ndarray:
+    """Distances TSPLIB entre deux ensembles de villes
+
+    Parameters
+    ----------
+    a : np.ndarray
+        coordonnées 2D de villes
+    b : np.ndarray
+        coordonnées 2D de villes
+    type_distance : str
+        fonction de distance parmi `TYPES_DISTANCE_TSPLIB`
+
+    Returns
+    -------
+    np.ndarray
+        tableau len(a) x len(b) des distances entières
+    """
+    if type_distance == 'GEO':
+        a, b = radians_geo(a), radians_geo(b)
+        q1 = np.cos(a[:, np.newaxis, 1] - b[np.newaxis, :, 1])
+        q2 = np.cos(a[:, np.newaxis, 0] - b[np.newaxis, :, 0])
+        q3 = np.cos(a[:, np.newaxis, 0] + b[np.newaxis, :, 0])
+        arc = np.arccos(np.clip(0.5*((1.0 + q1)*q2 - (1.0 - q1)*q3), -1, 1))
+        return (RAYON_TERRE_TSPLIB * arc + 1.0).astype(np.int64)
+
+    if type_distance == 'ATT':
+        r = distance.cdist(a, b, 'euclidean') / np.sqrt(10.0)
+        t = np.floor(r + 0.5)
+        return (t + (t < r)).astype(np.int64)
+
+    d = distance.cdist(a, b, 'euclidean')
+    if type_distance == 'CEIL_2D':
+        return np.ceil(d).astype(np.int64)
+    # nint(x) = (int) (x + 0.5)
+    return np.floor(d + 0.5).astype(np.int64)
+
+
+def matrice_distance_tsplib(coordonnees: np.ndarray, type_distance: str) -> np.ndarray:
+    """Matrice int32 des distances TSPLIB, même convention que le mode `tsplib`
+
+    Parameters
+    ----------
+    coordonnees : np.ndarray
+        coordonnées 2D des villes
+    type_distance : str
+        fonction de distance parmi `TYPES_DISTANCE_TSPLIB`
 
     Returns
     -------
     np.ndarray
         matrice stockant l'integralité des distances inter villes
     """
-    dist_matrice = distance.cdist(
-        villes[['x', 'y']], villes[['x', 'y']], 'euclidean')
+    assert type_distance in TYPES_DISTANCE_TSPLIB, print(
+        "Veuillez choisir une distance parmi : {}".format(TYPES_DISTANCE_TSPLIB))
 
-    # On remplace les zéros des diagonales
-    dist_matrice = np.where(dist_matrice == 0, np.Inf, dist_matrice)
+    n = len(coordonnees)
+    dist_matrice = np.empty((n, n), dtype=np.int32)
+    # Calcul par blocs de lignes comme pour `matrice_distance`
+    for debut in range(0, n, TAILLE_BLOC):
+        dist_matrice[debut:debut+TAILLE_BLOC] = distances_tsplib(
+            coordonnees[debut:debut+TAILLE_BLOC], coordonnees, type_distance)
+    np.fill_diagonal(dist_matrice, DIAGONALE_ENTIERE)
+    return dist_matrice
+
+
+# Formats des matrices explicites TSPLIB (EDGE_WEIGHT_TYPE : EXPLICIT). Les formats par
+# colonnes parcourent les mêmes valeurs que ceux par lignes du triangle opposé
+FORMATS_EXPLICITES = ['FULL_MATRIX', 'UPPER_ROW', 'LOWER_ROW', 'UPPER_DIAG_ROW', 'LOWER_DIAG_ROW',
+                      'UPPER_COL', 'LOWER_COL', 'UPPER_DIAG_COL', 'LOWER_DIAG_COL']
+
+
+def nombre_poids_explicites(n: int, format_matrice: str) -> int:
+    """Nombre de valeurs d'une matrice explicite TSPLIB
+
+    Parameters
+    ----------
+    n : int
+        nombre de villes
+    format_matrice : str
+        format parmi `FORMATS_EXPLICITES`
+
+    Returns
+    -------
+    int
+        nombre de valeurs de la section EDGE_WEIGHT_SECTION
+    """
+    if format_matrice == 'FULL_MATRIX':
+        return n * n
+    if 'DIAG' in format_matrice:
+        return n * (n + 1) // 2
+    return n * (n - 1) // 2
+
+
+def matrice_explicite(poids: np.ndarray, n: int, format_matrice: str) -> np.ndarray:
+    """Matrice des distances d'une instance TSPLIB explicite
+
+    Parameters
+    ----------
+    poids : np.ndarray
+        valeurs de la section EDGE_WEIGHT_SECTION, dans l'ordre du fichier
+    n : int
+        nombre de villes
+    format_matrice : str
+        format parmi `FORMATS_EXPLICITES`
+
+    Returns
+    -------
+    np.ndarray
+        matrice stockant l'integralité des distances inter villes, en int32 (même
+        convention que le mode `tsplib`) si toutes les distances sont entières
+    """
+    assert format_matrice in FORMATS_EXPLICITES, print(
+        "Veuillez choisir un format parmi : {}".format(FORMATS_EXPLICITES))
+
+    entiere = bool(np.all(poids == np.round(poids)))
+    dist_matrice = np.zeros((n, n), dtype=np.int32 if entiere else np.float64)
+    if format_matrice == 'FULL_MATRIX':
+        dist_matrice[:] = poids.reshape(n, n)
+    else:
+        # Triangle parcouru ligne par ligne, un format par colonnes étant celui par
+        # lignes du triangle opposé
+        superieur = format_matrice.startswith('UPPER') == format_matrice.endswith('ROW')
+        decalage = 0 if 'DIAG' in format_matrice else 1
+        i, j = np.triu_indices(n, decalage) if superieur else np.tril_indices(n, -decalage)
+        dist_matrice[i, j] = poids
+        dist_matrice[j, i] = poids
+
+    np.fill_diagonal(dist_matrice, DIAGONALE_ENTIERE if entiere else np.inf)
     return dist_matrice
 
 
 def distance_trajet(itineraire: list[int], matrice_distance: np.ndarray) -> float:
     """Calcul de la distance totale d'un trajet
 
+    Les arêtes du trajet sont récupérées en une seule indexation de la matrice
+    puis sommées.
+
     Parameters
     ----------
     itineraire : list[int]
@@ -60,11 +475,55 @@ def distance_trajet(itineraire: list[int], matrice_distance: np.ndarray) -> floa
     float
         la distance de l'itinéraire considéré
     """
-    distance = 0
-    for index, ville in enumerate(itineraire[:-1]):
-        # distance entre la ville itineraire[index] et itineraire[index+1]
-        distance += matrice_distance[ville, itineraire[index+1]]
-    return distance
+    itineraire = np.asarray(itineraire)
+    # distance entre la ville itineraire[index] et itineraire[index+1]
+    return matrice_distance[itineraire[:-1], itineraire[1:]].sum()
+
+
+def distances_trajets(itineraires: np.ndarray, matrice_distance: np.ndarray) -> np.ndarray:
+    """Calcul de la distance totale d'un ensemble de trajets
+
+    Chaque ligne de `itineraires` est un trajet. Toutes les arêtes de tous les
+    trajets sont lues en une indexation puis sommées ligne par ligne.
+
+    Parameters
+    ----------
+    itineraires : np.ndarray
+        tableau 2D, une ligne par trajet (ou 1D pour un unique trajet)
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+
+    Returns
+    -------
+    np.ndarray
+        vecteur des distances de chacun des trajets
+    """
+    itineraires = np.atleast_2d(itineraires)
+    return matrice_distance[itineraires[:, :-1], itineraires[:, 1:]].sum(axis=1)
+
+
+def distances_cumulees(itineraire: list[int], matrice_distance: np.ndarray) -> np.ndarray:
+    """Somme cumulée des arêtes d'un trajet
+
+    La distance parcourue entre la position i et la position j (i <= j) du
+    trajet vaut alors `cumul[j] - cumul[i]`, calculée en O(1).
+
+    Parameters
+    ----------
+    itineraire : list[int]
+        liste ordonnées des villes parcourues
+    matrice_distance : np.ndarray
+        matrice stockant l'integralité des distances inter villes
+
+    Returns
+    -------
+    np.ndarray
+        vecteur de même taille que l'itinéraire, `cumul[0]` valant 0
+    """
+    itineraire = np.asarray(itineraire)
+    cumul = np.zeros(len(itineraire))
+    np.cumsum(matrice_distance[itineraire[:-1], itineraire[1:]], out=cumul[1:])
+    return cumul
 
 
 def neurone_gagnant(neurones: np.ndarray, ville: np.ndarray) -> np.intp:
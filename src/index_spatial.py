@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+# Index spatial (KD-tree) construit une seule fois par jeu de données et partagé
+# par les algorithmes. Il évite les parcours linéaires de toutes les villes lors de la
+# recherche des villes les plus proches d'un point.
+
+# Cf. https://fr.wikipedia.org/wiki/Arbre_kd
+
+# Nombre de voisins candidats conservés par ville
+NOMBRE_VOISINS = 10
+
+
+def construction_index(villes: pd.DataFrame | np.ndarray) -> cKDTree:
+    """Construction d'un KD-tree sur les coordonnées des villes
+
+    Parameters
+    ----------
+    villes : DataFrame | np.ndarray
+        dataframe stockant l'intégralité des coordonnées des villes à parcourir
+        ou directement un tableau de points 2D
+
+    Returns
+    -------
+    cKDTree
+        index spatial des villes, l'index d'un point est celui de sa ville
+    """
+    if isinstance(villes, pd.DataFrame):
+        villes = villes[['x', 'y']].to_numpy(dtype=np.float64)
+    return cKDTree(villes)
+
+
+def voisins_candidats(index: cKDTree, k: int = NOMBRE_VOISINS) -> np.ndarray:
+    """Liste des k plus proches voisins de chaque ville
+
+    Parameters
+    ----------
+    index : cKDTree
+        index spatial des villes
+    k : int (optionnel)
+        nombre de voisins par ville
+
+    Returns
+    -------
+    np.ndarray
+        tableau n x k, la ligne i donne les voisins de la ville i du plus
+        proche au plus éloigné (la ville i elle-même est exclue)
+    """
+    n = index.n
+    k = min(k, n - 1)
+    _, voisins = index.query(index.data, k=k+1)
+    voisins = voisins.reshape(n, k+1)
+
+    # On retire chaque ville de sa propre liste. En cas de villes confondues elle
+    # peut ne pas être en première position, voire absente : on retire alors la dernière
+    conserve = voisins != np.arange(n)[:, np.newaxis]
+    absente = conserve.all(axis=1)
+    conserve[absente, -1] = False
+    return voisins[conserve].reshape(n, k)
+
+
+def villes_dans_rayon(index: cKDTree, point: np.ndarray, rayon: float) -> np.ndarray:
+    """Recherche des villes à une distance inférieure à `rayon` d'un point
+
+    Parameters
+    ----------
+    index : cKDTree
+        index spatial des villes
+    point : np.ndarray
+        coordonnées 2D du point
+    rayon : float
+        distance maximale
+
+    Returns
+    -------
+    np.ndarray
+        index des villes trouvées
+    """
+    return np.array(index.query_ball_point(point, rayon), dtype=np.intp)
+
+
+def plus_proche_point(index: cKDTree, points: np.ndarray, nombre_threads: int = 1) -> np.ndarray:
+    """Recherche du point indexé le plus proche de chacun des points donnés
+
+    Parameters
+    ----------
+    index : cKDTree
+        index spatial des points de référence
+    points : np.ndarray
+        tableau de points 2D
+    nombre_threads : int (optionnel)
+        nombre de threads se partageant les points, -1 pour utiliser tous les coeurs
+
+    Returns
+    -------
+    np.ndarray
+        pour chaque point, l'index du point de référence le plus proche
+    """
+    _, plus_proches = index.query(points, k=1, workers=nombre_threads)
+    return plus_proches
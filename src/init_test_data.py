@@ -1,6 +1,13 @@
+import hashlib
+import os
+import tempfile
+
 import numpy as np
 import pandas as pd
 
+from src.distance import (TYPES_DISTANCE_TSPLIB, matrice_distance_tsplib,
+                          matrice_explicite, nombre_poids_explicites)
+
 
 # Pour favoriser la réutilisation par la comunauté scientifique
 # les tests des algorithmes implémentés peuvent être réalisées sur
@@ -10,6 +17,185 @@ import pandas as pd
 # http://comopt.ifi.uni-heidelberg.de/software/TSPLIB95/tsp/
 
 
+# Les fichiers .tsp sont lus en une seule passe puis leur contenu est sauvegardé au format
+# .npz : les lectures suivantes d'une même instance ne font que charger des tableaux.
+DOSSIER_CACHE_TSPLIB = "cache/tsplib/"
+
+# Types de distance TSPLIB pris en charge
+TYPES_DISTANCE = TYPES_DISTANCE_TSPLIB + ['EXPLICIT']
+
+
+def lecture_valeurs(lignes, nombre_valeurs: int) -> list[str]:
+    """Lecture des valeurs d'une section, réparties sur un nombre quelconque de lignes
+
+    Parameters
+    ----------
+    lignes : Iterator[str]
+        lignes restantes du fichier
+    nombre_valeurs : int
+        nombre de valeurs à lire
+
+    Returns
+    -------
+    list[str]
+        les valeurs lues
+    """
+    valeurs = []
+    for ligne in lignes:
+        valeurs.extend(ligne.split())
+        if len(valeurs) >= nombre_valeurs:
+            break
+    if len(valeurs) < nombre_valeurs:
+        raise ValueError(
+            "Section incomplète : {} valeurs attendues, {} lues".format(nombre_valeurs, len(valeurs)))
+    return valeurs[:nombre_valeurs]
+
+
+def lecture_lignes(lignes, nombre_lignes: int) -> list[list[str]]:
+    """Lecture des lignes non vides d'une section à une entrée par ligne
+
+    Parameters
+    ----------
+    lignes : Iterator[str]
+        lignes restantes du fichier
+    nombre_lignes : int
+        nombre de lignes non vides à lire
+
+    Returns
+    -------
+    list[list[str]]
+        les valeurs de chaque ligne lue
+    """
+    entrees = []
+    for ligne in lignes:
+        valeurs = ligne.split()
+        if valeurs:
+            entrees.append(valeurs)
+            if len(entrees) >= nombre_lignes:
+                break
+    if len(entrees) < nombre_lignes:
+        raise ValueError(
+            "Section incomplète : {} lignes attendues, {} lues".format(nombre_lignes, len(entrees)))
+    return entrees
+
+
+def lecture_TSPLIB(fichier: str) -> tuple[dict[str, str], np.ndarray, np.ndarray, np.ndarray]:
+    """Lecture d'un fichier au format .tsp en une seule passe
+
+    Les mots clés de l'entête sont acceptés avec ou sans espace avant les deux points
+    (`DIMENSION : 52`, `DIMENSION: 52`) et quelle que soit leur casse.
+
+    Parameters
+    ----------
+    fichier : str
+        chemin du fichier .tsp
+
+    Returns
+    -------
+    entete : dict[str, str]
+        mots clés de l'entête et leur valeur (`NAME`, `DIMENSION`, `EDGE_WEIGHT_TYPE`...)
+    noms : np.ndarray
+        nom (numéro) de chaque ville
+    coordonnees : np.ndarray
+        coordonnées 2D des villes (NODE_COORD_SECTION, à défaut DISPLAY_DATA_SECTION),
+        tableau vide si le fichier n'en contient pas
+    poids : np.ndarray
+        valeurs de la section EDGE_WEIGHT_SECTION, tableau vide si le fichier n'en
+        contient pas
+    """
+    entete = {}
+    noms = np.empty(0, dtype=str)
+    coordonnees = np.empty((0, 2))
+    poids = np.empty(0)
+
+    with open(fichier) as lignes:
+        for ligne in lignes:
+            ligne = ligne.strip()
+            if not ligne:
+                continue
+            if ':' in ligne:
+                cle, valeur = ligne.split(':', 1)
+            else:
+                cle, _, valeur = ligne.partition(' ')
+            cle, valeur = cle.strip().upper(), valeur.strip()
+
+            if cle == 'EOF':
+                break
+            if not cle.endswith('_SECTION'):
+                entete[cle] = valeur
+                continue
+
+            dimension = int(entete['DIMENSION'])
+            if cle in ('NODE_COORD_SECTION', 'DISPLAY_DATA_SECTION'):
+                # Une ville par ligne : numéro puis coordonnées (2 ou 3), seules les
+                # deux premières étant conservées
+                valeurs = np.array([entree[:3]
+                                    for entree in lecture_lignes(lignes, dimension)])
+                # Les coordonnées des villes priment sur celles d'affichage
+                if cle == 'NODE_COORD_SECTION' or len(coordonnees) == 0:
+                    noms = valeurs[:, 0]
+                    coordonnees = valeurs[:, 1:3].astype(np.float64)
+            elif cle == 'EDGE_WEIGHT_SECTION':
+                format_matrice = entete.get(
+                    'EDGE_WEIGHT_FORMAT', 'FULL_MATRIX').upper()
+                poids = np.array(lecture_valeurs(
+                    lignes, nombre_poids_explicites(dimension, format_matrice)), dtype=np.float64)
+            elif cle == 'DEMAND_SECTION':
+                lecture_lignes(lignes, dimension)
+            else:
+                # Sections terminées par -1 (TOUR_SECTION, FIXED_EDGES_SECTION...)
+                for ligne in lignes:
+                    if ligne.split()[-1:] == ['-1']:
+                        break
+
+    if len(noms) == 0 and 'DIMENSION' in entete:
+        noms = np.arange(1, int(entete['DIMENSION']) + 1).astype(str)
+    return entete, noms, coordonnees, poids
+
+
+def instance_TSPLIB(fichier: str, dossier: str = DOSSIER_CACHE_TSPLIB) -> tuple[dict[str, str], np.ndarray, np.ndarray, np.ndarray]:
+    """Contenu d'un fichier .tsp, lu depuis le cache .npz s'il y est déjà
+
+    Le cache est indexé par le chemin du fichier, sa taille et sa date de modification :
+    un fichier modifié est relu.
+
+    Parameters
+    ----------
+    fichier : str
+        chemin du fichier .tsp
+    dossier : str (optionnel)
+        dossier du cache
+
+    Returns
+    -------
+    tuple[dict[str, str], np.ndarray, np.ndarray, np.ndarray]
+        entête, noms, coordonnées et poids, voir `lecture_TSPLIB`
+    """
+    etat = os.stat(fichier)
+    empreinte = hashlib.sha1("{}:{}:{}".format(
+        os.path.abspath(fichier), etat.st_size, etat.st_mtime_ns).encode())
+    chemin = os.path.join(dossier, f"{empreinte.hexdigest()}.npz")
+
+    if os.path.exists(chemin):
+        with np.load(chemin) as cache:
+            entete = dict(zip(cache['cles'].tolist(),
+                          cache['valeurs'].tolist()))
+            return entete, cache['noms'], cache['coordonnees'], cache['poids']
+
+    entete, noms, coordonnees, poids = lecture_TSPLIB(fichier)
+
+    # Ecriture dans un fichier temporaire puis renommage atomique, comme pour le cache
+    # des matrices des distances
+    os.makedirs(dossier, exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix='.tmp')
+    with os.fdopen(descripteur, 'wb') as f:
+        np.savez(f, cles=np.array(list(entete.keys()), dtype=str),
+                 valeurs=np.array(list(entete.values()), dtype=str),
+                 noms=noms, coordonnees=coordonnees, poids=poids)
+    os.replace(temporaire, chemin)
+    return entete, noms, coordonnees, poids
+
+
 def data_TSPLIB(fichier: str) -> pd.DataFrame:
     """
     Lecture d'un fichier au format .tsp en copiant les informations dans 
@@ -26,39 +212,41 @@ def data_TSPLIB(fichier: str) -> pd.DataFrame:
         L'ensemble des villes ainsi crées depuis le fichier .tsp. Sous la forme 
         `'Ville', 'x', 'y'`
     """
-    with open(fichier) as f:
-        noeud_coord_debut = None
-        dimension = None
-        lignes = f.readlines()
-
-        # Lecture des informations du fichier .tsp
-        i = 0
-        while not dimension or not noeud_coord_debut:
-            ligne = lignes[i]
-            if ligne.startswith('DIMENSION :'):
-                dimension = int(ligne.split()[-1])
-            if ligne.startswith('NODE_COORD_SECTION'):
-                noeud_coord_debut = i
-            i = i+1
-
-        # On définit le point de référence au début du fichier
-        f.seek(0)
-
-        villes = pd.read_csv(
-            f,
-            # On commence la lecture du fichier au bon endroit
-            skiprows=noeud_coord_debut + 1,
-            # Définition du séparateur
-            sep=' ',
-            # Définition des colonnes du dataframe
-            names=['Ville', 'x', 'y'],
-            # Définition du type des colonnes
-            dtype={'Ville': str, 'x': np.float64, 'y': np.float64},
-            header=None,
-            nrows=dimension
-        )
-
-        return villes
+    _, noms, coordonnees, _ = instance_TSPLIB(fichier)
+    if len(coordonnees) == 0:
+        raise ValueError(
+            "Le fichier {} ne contient aucune coordonnée, utiliser `matrice_TSPLIB`".format(fichier))
+
+    return pd.DataFrame({'Ville': noms.astype(str).astype(object),
+                         'x': coordonnees[:, 0], 'y': coordonnees[:, 1]})
+
+
+def matrice_TSPLIB(fichier: str) -> np.ndarray:
+    """Matrice des distances officielle d'une instance TSPLIB
+
+    Les distances sont calculées selon le type `EDGE_WEIGHT_TYPE` du fichier, ou lues
+    directement pour une instance explicite. Elles diffèrent des distances euclidiennes
+    de `src.distance.matrice_distance` pour les instances ATT, GEO ou CEIL_2D.
+
+    Parameters
+    ----------
+    fichier : str
+        chemin du fichier .tsp
+
+    Returns
+    -------
+    np.ndarray
+        matrice stockant l'integralité des distances inter villes
+    """
+    entete, _, coordonnees, poids = instance_TSPLIB(fichier)
+    type_distance = entete.get('EDGE_WEIGHT_TYPE', 'EUC_2D').upper()
+    assert type_distance in TYPES_DISTANCE, print(
+        "Type de distance non pris en charge, types possibles : {}".format(TYPES_DISTANCE))
+
+    if type_distance == 'EXPLICIT':
+        return matrice_explicite(poids, int(entete['DIMENSION']),
+                                 entete.get('EDGE_WEIGHT_FORMAT', 'FULL_MATRIX').upper())
+    return matrice_distance_tsplib(coordonnees, type_distance)
 
 
 def trajet_en_df(trajet: list[int], data: pd.DataFrame) -> pd.DataFrame:
@@ -89,7 +277,7 @@ def trajet_en_df(trajet: list[int], data: pd.DataFrame) -> pd.DataFrame:
     return df_res
 
 
-def normalisation(villes: pd.DataFrame) -> pd.Series:
+def normalisation(villes: pd.DataFrame) -> pd.DataFrame:
     """Normalisation des coordonnées des villes afin de faciliter
     l'apprentissage du réseau de neuronnes
 
@@ -101,11 +289,12 @@ def normalisation(villes: pd.DataFrame) -> pd.Series:
 
     Returns
     -------
-    Series
-        Villes du dataframe normalisées
+    DataFrame
+        Villes du dataframe normalisées, le dataframe d'origine n'est pas modifié
     """
-    ratio = (villes.x.max() - villes.x.min()) / \
-        (villes.y.max() - villes.y.min()), 1
+    # Opérations sur le tableau complet, colonne par colonne par broadcasting
+    minimum = villes.min()
+    etendue = villes.max() - minimum
+    ratio = etendue.x / etendue.y, 1
     ratio = np.array(ratio) / max(ratio)
-    norm = villes.apply(lambda c: (c - c.min()) / (c.max() - c.min()))
-    return norm.apply(lambda p: ratio * p, axis=1)
+    return (villes - minimum) / etendue * ratio
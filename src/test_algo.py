@@ -1,20 +1,31 @@
+import time
+import tracemalloc
+
 import numpy as np
 import pandas as pd
 
 import src.algo_2_opt
 import src.algo_genetique
+import src.algo_glouton
+import src.algo_hilbert
 import src.algo_kohonen
+import src.algo_lin_kernighan
+import src.algo_or_opt
 import src.algo_proche_voisin
 from src.affichage_resultats import affichage
-from src.distance import matrice_distance
+from src.cache_distance import matrice_distance_cache
+from src.distance import MODES_MATRICE, distance_trajet, matrice_distance
+from src.index_spatial import construction_index, voisins_candidats
 from src.init_test_data import data_TSPLIB
+from src.tour import STRUCTURES
 
 # Nom des data de test
 ENSEMBLE_TEST = ['dj38', 'xqf131', 'qa194', 'xqg237',
                  'pma343', 'pka379', 'pbl395', 'pbk411', 'pbn423']
 
 # Nom des algo implémentés
-ENSEMBLE_ALGOS = ['2-opt', 'plus_proche_voisin', 'genetique', 'kohonen']
+ENSEMBLE_ALGOS = ['2-opt', 'plus_proche_voisin',
+                  'genetique', 'kohonen', 'lin_kernighan', 'hilbert', 'glouton']
 
 
 def test_global(algorithme: str) -> pd.DataFrame:
@@ -23,7 +34,7 @@ def test_global(algorithme: str) -> pd.DataFrame:
     Parameters
     ----------
     algo : str
-        le nom de l'algorithme à utiliser parmi `['2-opt', 'plus_proche_voisin', 'genetique', 'kohonen']`
+        le nom de l'algorithme à utiliser parmi `ENSEMBLE_ALGOS`
 
     Returns
     -------
@@ -67,7 +78,7 @@ def test_global(algorithme: str) -> pd.DataFrame:
     return df_resultat_test
 
 
-def test_unitaire(num_dataset: int, algo: str) -> tuple[pd.DataFrame, list]:
+def test_unitaire(num_dataset: int, algo: str, mode_matrice: str = 'float64') -> tuple[pd.DataFrame, list]:
     """Lancement d'un test unitaire pour un algorithme
 
     Parameters
@@ -77,6 +88,8 @@ def test_unitaire(num_dataset: int, algo: str) -> tuple[pd.DataFrame, list]:
         index dans `ENSEMBLE_TEST`
     algo : str
         le nom de l'algorithme à utiliser
+    mode_matrice : str (optionnel)
+        mode de stockage de la matrice des distances parmi `MODES_MATRICE`
 
     Returns
     -------
@@ -92,33 +105,50 @@ def test_unitaire(num_dataset: int, algo: str) -> tuple[pd.DataFrame, list]:
     # Initialisation du dataframe avec TSPLIB
     data = data_TSPLIB(f'data/{ENSEMBLE_TEST[num_dataset]}.tsp')
 
-    # Initialisation de la matrice des distances relatives
-    mat_distance = matrice_distance(data)
+    # Initialisation de la matrice des distances relatives. Elle n'est calculée qu'au
+    # premier test sur ce jeu de données puis relue depuis le cache disque
+    mat_distance = matrice_distance_cache(data, mode_matrice)
+
+    # Les algorithmes ne retournent pas les chemins explorés pour ne pas surcharger
+    # les résultats. Exploration est donc initialisée à une liste vide pour conserver le bon type
+    exploration = []
 
     if algo == '2-opt':
         # On prend un chemin initial meilleur qu'un chemin aléatoire
-        chemin_initial, _, _ = src.algo_proche_voisin.plus_proche_voisin(
+        chemin_initial, _ = src.algo_proche_voisin.plus_proche_voisin_multiple(
             mat_distance)
         # Lancement de l'algorithme 2-opt
-        df_res, exploration = src.algo_2_opt.main(
+        df_res = src.algo_2_opt.main(
             mat_distance, chemin_initial, ENSEMBLE_TEST[num_dataset])
 
     elif algo == 'plus_proche_voisin':
         # Lancement de l'algorithme plus proche voisin
-        df_res, exploration = src.algo_proche_voisin.main(
+        df_res = src.algo_proche_voisin.main(
             mat_distance, ENSEMBLE_TEST[num_dataset])
 
     elif algo == 'genetique':
         # Lancement de l'algorithme génétique
         df_res = src.algo_genetique.main(
             data, mat_distance, ENSEMBLE_TEST[num_dataset])
-        # Il n'y a pas de réelle méthode d'exploration : le fruit du hasard
-        # Exploration est donc initialisée à une liste vide pour conserver le bon type
-        exploration = []
+
+    elif algo == 'lin_kernighan':
+        # Lancement de l'algorithme de Lin-Kernighan
+        df_res = src.algo_lin_kernighan.main(
+            data, mat_distance, ENSEMBLE_TEST[num_dataset])
+
+    elif algo == 'hilbert':
+        # Lancement de la construction par courbe de Hilbert
+        df_res = src.algo_hilbert.main(
+            data, mat_distance, ENSEMBLE_TEST[num_dataset])
+
+    elif algo == 'glouton':
+        # Lancement de la construction gloutonne par arêtes
+        df_res = src.algo_glouton.main(
+            data, mat_distance, ENSEMBLE_TEST[num_dataset])
 
     else:
         # Lancement de l'algorithme de kohonen
-        df_res, exploration = src.algo_kohonen.main(
+        df_res = src.algo_kohonen.main(
             data, mat_distance, ENSEMBLE_TEST[num_dataset])
 
     # Sauvegarde au format .png du chemin final trouvé
@@ -126,3 +156,169 @@ def test_unitaire(num_dataset: int, algo: str) -> tuple[pd.DataFrame, list]:
               ENSEMBLE_TEST[num_dataset]))
 
     return df_res, exploration
+
+
+def test_memoire(num_dataset: int) -> pd.DataFrame:
+    """Mesure de la mémoire nécessaire à la matrice des distances pour chaque mode de stockage
+
+    Parameters
+    ----------
+    num_dataset : int
+        numéro du dataset sur lequel est réalisé le test. Ce numéro est égale à son
+        index dans `ENSEMBLE_TEST`
+
+    Returns
+    -------
+    Dataframe
+        une ligne par mode de stockage :
+        `'Mode', 'Nom dataset', 'Nombre de villes', 'Taille matrice (en Mo)', 'Pic mémoire (en Mo)', 'Temps de calcul (en s)'`
+    """
+    data = data_TSPLIB(f'data/{ENSEMBLE_TEST[num_dataset]}.tsp')
+
+    resultats = []
+    for mode in MODES_MATRICE:
+        tracemalloc.start()
+        start_time = time.time()
+        mat_distance = matrice_distance(data, mode)
+        temps_calcul = time.time() - start_time
+        # Pic d'allocation pendant la construction de la matrice
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        resultats.append({
+            'Mode': mode,
+            'Nom dataset': ENSEMBLE_TEST[num_dataset],
+            'Nombre de villes': len(mat_distance),
+            'Taille matrice (en Mo)': mat_distance.nbytes / 1e6,
+            'Pic mémoire (en Mo)': pic / 1e6,
+            'Temps de calcul (en s)': temps_calcul
+        })
+
+    return pd.DataFrame(resultats)
+
+
+def test_moteurs_2_opt() -> pd.DataFrame:
+    """Comparaison des implémentations du 2-opt sur l'ensemble des jeux de données
+
+    Tous les moteurs partent du même chemin donné par le plus proche voisin multi-départs.
+
+    Returns
+    -------
+    Dataframe
+        une ligne par moteur et par jeu de données :
+        `'Moteur', 'Politique', 'Structure', 'Nom dataset', 'Nombre de villes', 'Distance', 'Temps de calcul (en s)'`
+    """
+    resultats = []
+    for num_dataset in range(len(ENSEMBLE_TEST)):
+        # Feeback d'avancement
+        print(f"Etape du test : {num_dataset+1}/{len(ENSEMBLE_TEST)}")
+        data = data_TSPLIB(f'data/{ENSEMBLE_TEST[num_dataset]}.tsp')
+        mat_distance = matrice_distance_cache(data)
+        chemin_initial, _ = src.algo_proche_voisin.plus_proche_voisin_multiple(
+            mat_distance)
+        voisins = voisins_candidats(construction_index(data))
+
+        for moteur in src.algo_2_opt.MOTEURS:
+            # La politique n'a de sens que pour les moteurs parcourant tous les couples
+            politiques = src.algo_2_opt.POLITIQUES if moteur in [
+                'sur_place', 'vectorise'] else ['premiere']
+            # et la représentation du cycle que pour le moteur sur les voisins
+            structures = STRUCTURES if moteur == 'voisins' else ['tableau']
+            for politique in politiques:
+                for structure in structures:
+                    df_res = src.algo_2_opt.main(
+                        mat_distance, chemin_initial, ENSEMBLE_TEST[num_dataset], voisins, moteur, politique, structure)
+                    resultats.append({
+                        'Moteur': moteur,
+                        'Politique': politique,
+                        'Structure': structure,
+                        'Nom dataset': ENSEMBLE_TEST[num_dataset],
+                        'Nombre de villes': df_res['Nombre de villes'][0],
+                        'Distance': df_res['Distance'][0],
+                        'Temps de calcul (en s)': df_res['Temps de calcul (en s)'][0]
+                    })
+
+    return pd.DataFrame(resultats)
+
+
+def test_doublons_float32(nombre_ville: int = 150) -> pd.DataFrame:
+    """Non régression des recherches locales sur des villes confondues en float32
+
+    Les villes ont des coordonnées entières dans une petite grille, beaucoup sont donc
+    confondues. En float32, échanger deux villes confondues donnait un gain arrondi
+    positif dans les deux sens et les moteurs se fiant au gain bouclaient sans fin.
+
+    Parameters
+    ----------
+    nombre_ville : int (optionnel)
+        nombre de villes de l'instance
+
+    Returns
+    -------
+    Dataframe
+        une ligne par moteur du 2-opt, méthode de l'Or-opt ou structure du Lin-Kernighan :
+        `'Moteur', 'Politique', 'Structure', 'Distance initiale', 'Distance', 'Temps de calcul (en s)'`
+    """
+    generateur = np.random.default_rng(0)
+    coordonnees = generateur.integers(0, 20, size=(nombre_ville, 2))
+    data = pd.DataFrame({'Ville': np.arange(nombre_ville),
+                         'x': coordonnees[:, 0].astype(float), 'y': coordonnees[:, 1].astype(float)})
+    mat_distance = matrice_distance(data, 'float32')
+    chemin_initial, _ = src.algo_proche_voisin.plus_proche_voisin_multiple(
+        mat_distance)
+    distance_initiale = distance_trajet(chemin_initial, mat_distance)
+    voisins = voisins_candidats(construction_index(data))
+
+    resultats = []
+    for moteur in src.algo_2_opt.MOTEURS:
+        politiques = src.algo_2_opt.POLITIQUES if moteur in [
+            'sur_place', 'vectorise'] else ['premiere']
+        structures = STRUCTURES if moteur == 'voisins' else ['tableau']
+        for politique in politiques:
+            for structure in structures:
+                df_res = src.algo_2_opt.main(
+                    mat_distance, chemin_initial, 'doublons', voisins, moteur, politique, structure)
+                assert df_res['Distance'][0] <= distance_initiale + 1e-3, print(
+                    f"Le moteur {moteur} ({politique}, {structure}) a allongé le trajet")
+                resultats.append({
+                    'Moteur': moteur,
+                    'Politique': politique,
+                    'Structure': structure,
+                    'Distance initiale': distance_initiale,
+                    'Distance': df_res['Distance'][0],
+                    'Temps de calcul (en s)': df_res['Temps de calcul (en s)'][0]
+                })
+
+    # L'Or-2opt enchaîne déplacements de segments et inversions 2-opt
+    for methode in ['or-opt', 'or-2opt']:
+        for structure in STRUCTURES:
+            df_res = src.algo_or_opt.main(
+                mat_distance, chemin_initial, voisins, 'doublons', methode, structure)
+            assert df_res['Distance'][0] <= distance_initiale + 1e-3, print(
+                f"La méthode {methode} ({structure}) a allongé le trajet")
+            resultats.append({
+                'Moteur': methode,
+                'Politique': 'premiere',
+                'Structure': structure,
+                'Distance initiale': distance_initiale,
+                'Distance': df_res['Distance'][0],
+                'Temps de calcul (en s)': df_res['Temps de calcul (en s)'][0]
+            })
+
+    # Le Lin-Kernighan enchaîne ses mouvements sans limite avant la première perturbation
+    for structure in STRUCTURES:
+        itineraire, temps_calcul = src.algo_lin_kernighan.lin_kernighan(
+            chemin_initial, mat_distance, voisins, 1, structure)
+        distance = distance_trajet(itineraire, mat_distance)
+        assert distance <= distance_initiale + 1e-3, print(
+            f"Le Lin-Kernighan ({structure}) a allongé le trajet")
+        resultats.append({
+            'Moteur': 'lin_kernighan',
+            'Politique': 'premiere',
+            'Structure': structure,
+            'Distance initiale': distance_initiale,
+            'Distance': distance,
+            'Temps de calcul (en s)': temps_calcul
+        })
+
+    return pd.DataFrame(resultats)
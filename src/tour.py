@@ -0,0 +1,347 @@
+import math
+
+import numpy as np
+
+# Représentations d'un cycle utilisées par les recherches locales (2-opt, Or-opt,
+# Lin-Kernighan). Elles répondent aux mêmes requêtes : successeur, prédécesseur, ordre
+# de trois villes, inversion d'une portion du cycle et déplacement d'un segment.
+# - TourTableau : tableau des villes et position de chaque ville. Requêtes en O(1),
+#   inversion en O(n) (du côté le plus court du cycle)
+# - TourDeuxNiveaux : liste à deux niveaux, le cycle est découpé en environ √n segments
+#   pouvant chacun être parcouru à l'envers. Requêtes en O(1), inversion en O(√n)
+
+# Cf. Fredman et al., "Data structures for traveling salesmen", 1995
+
+# Représentations disponibles
+STRUCTURES = ['tableau', 'deux_niveaux']
+
+
+def inversion_sur_place(chemin: np.ndarray, position: np.ndarray, debut: int, fin: int) -> None:
+    """Inversion sur place d'une portion du cycle
+
+    La portion va de la position `debut` à la position `fin` dans le sens de parcours et
+    peut passer par la fin du tableau. Inverser une portion ou la portion complémentaire
+    donne le même cycle (parcouru dans l'autre sens) : on inverse la plus courte des deux.
+
+    Parameters
+    ----------
+    chemin : np.ndarray
+        villes du cycle, sans répétition de la ville de départ
+    position : np.ndarray
+        position de chaque ville dans `chemin`, mise à jour
+    debut : int
+        position de la première ville de la portion
+    fin : int
+        position de la dernière ville de la portion
+    """
+    nombre_ville = len(chemin)
+    longueur = (fin - debut) % nombre_ville + 1
+    if 2*longueur > nombre_ville:
+        debut, fin = (fin + 1) % nombre_ville, (debut - 1) % nombre_ville
+        longueur = nombre_ville - longueur
+
+    positions = (debut + np.arange(longueur)) % nombre_ville
+    chemin[positions] = chemin[positions[::-1]]
+    position[chemin[positions]] = positions
+
+
+class Tour:
+    """Opérations communes aux représentations d'un cycle, écrites à partir de
+    `suivant`, `precedent` et `inverser`."""
+
+    def entre(self, a: int, b: int, c: int) -> bool:
+        """Vrai si b est sur le chemin allant de a à c dans le sens de parcours"""
+        position_a = self.position(a)
+        return (self.position(b) - position_a) % self.n <= (self.position(c) - position_a) % self.n
+
+    def echange_2opt(self, t1: int, t2: int, t3: int, t4: int) -> None:
+        """Mouvement 2-opt remplaçant les arêtes (t1, t2) et (t3, t4) par (t2, t3) et (t1, t4)
+
+        t2 est le successeur (respectivement le prédécesseur) de t1 et t4 le
+        prédécesseur (respectivement le successeur) de t3.
+        """
+        if self.suivant(t1) == t2:
+            self.inverser(t2, t4)
+        else:
+            self.inverser(t4, t2)
+
+    def deplacer_segment(self, premiere: int, derniere: int, x: int, inverse: bool) -> None:
+        """Déplacement du segment allant de `premiere` à `derniere` entre x et son successeur
+
+        Le déplacement est réalisé par trois inversions au plus.
+
+        Parameters
+        ----------
+        premiere : int
+            première ville du segment dans le sens de parcours
+        derniere : int
+            dernière ville du segment
+        x : int
+            ville, hors du segment, après laquelle le segment est inséré
+        inverse : bool
+            si vrai le segment est inséré dans l'autre sens
+        """
+        p, n = self.precedent(premiere), self.suivant(derniere)
+        # p [segment] n ... x y  ->  p x ... n [segment inversé] y
+        self.inverser(premiere, x)
+        # On remet dans l'ordre les villes allant de n à x, l'orientation du cycle
+        # ayant pu changer avec l'inversion précédente
+        if self.suivant(p) == x:
+            self.inverser(x, n)
+        else:
+            self.inverser(n, x)
+        # Le segment se trouve maintenant inversé entre x et y
+        if not inverse:
+            if self.suivant(x) == derniere:
+                self.inverser(derniere, premiere)
+            else:
+                self.inverser(premiere, derniere)
+
+
+class TourTableau(Tour):
+    """Cycle stocké dans un tableau int32 avec la position de chaque ville
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        villes du cycle dans l'ordre de parcours, sans répétition de la ville de départ
+    """
+
+    def __init__(self, villes: np.ndarray):
+        self.chemin = np.array(villes, dtype=np.int32)
+        self.n = len(self.chemin)
+        self.positions = np.empty(self.n, dtype=np.int32)
+        self.positions[self.chemin] = np.arange(self.n)
+
+    def position(self, v: int) -> int:
+        return int(self.positions[v])
+
+    def suivant(self, v: int) -> int:
+        return int(self.chemin[(self.positions[v] + 1) % self.n])
+
+    def precedent(self, v: int) -> int:
+        return int(self.chemin[self.positions[v] - 1])
+
+    def inverser(self, a: int, b: int) -> None:
+        """Inversion du chemin allant de a à b dans le sens de parcours"""
+        inversion_sur_place(self.chemin, self.positions,
+                            self.positions[a], self.positions[b])
+
+    def deplacer_segment(self, premiere: int, derniere: int, x: int, inverse: bool) -> None:
+        # Entre le segment et x, on décale directement le côté du cycle le plus court
+        nombre_ville = self.n
+        debut, fin = self.positions[premiere], self.positions[derniere]
+        longueur = (fin - debut) % nombre_ville + 1
+        position_x = self.positions[x]
+        # Nombre de villes entre la fin du segment et x (x compris), puis entre x et le segment
+        longueur_apres = (position_x - fin) % nombre_ville
+        longueur_avant = nombre_ville - longueur - longueur_apres
+
+        if longueur_apres <= longueur_avant:
+            # Le bloc [segment, villes jusqu'à x] devient [villes jusqu'à x, segment]
+            positions = (debut + np.arange(longueur +
+                         longueur_apres)) % nombre_ville
+            self.chemin[positions] = np.roll(self.chemin[positions], -longueur)
+            positions_segment = positions[-longueur:]
+        else:
+            # Le bloc [villes après x, segment] devient [segment, villes après x]
+            positions = (position_x + 1 + np.arange(longueur +
+                         longueur_avant)) % nombre_ville
+            self.chemin[positions] = np.roll(self.chemin[positions], longueur)
+            positions_segment = positions[:longueur]
+
+        if inverse:
+            self.chemin[positions_segment] = self.chemin[positions_segment[::-1]]
+        self.positions[self.chemin[positions]] = positions
+
+    def vers_tableau(self) -> np.ndarray:
+        return self.chemin.copy()
+
+
+class TourDeuxNiveaux(Tour):
+    """Cycle stocké dans une liste à deux niveaux
+
+    Le cycle est une suite d'environ √n segments, chaque segment étant un tableau de
+    villes associé à un bit d'inversion. Pour inverser une portion du cycle, on déplace
+    quelques villes entre segments voisins afin que la portion commence et finisse sur
+    des bords de segments, puis on inverse l'ordre des segments concernés et leurs bits :
+    O(√n). Quand un segment a trop grossi, la structure est reconstruite.
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        villes du cycle dans l'ordre de parcours, sans répétition de la ville de départ
+    """
+
+    def __init__(self, villes: np.ndarray):
+        self.n = len(villes)
+        self.taille_segment = max(1, math.isqrt(self.n))
+        self.segment_de = np.empty(self.n, dtype=np.int32)
+        self.rang = np.empty(self.n, dtype=np.int32)
+        self._construction(np.asarray(villes, dtype=np.int32))
+
+    def _construction(self, villes: np.ndarray) -> None:
+        """Découpage du cycle en segments de √n villes"""
+        self.villes = [villes[debut:debut+self.taille_segment].copy()
+                       for debut in range(0, self.n, self.taille_segment)]
+        self.longueur = [len(villes_segment) for villes_segment in self.villes]
+        self.inverse = [False] * len(self.villes)
+        # Segment à chaque rang du parcours, rang de chaque segment et position de
+        # sa première ville
+        self.ordre = list(range(len(self.villes)))
+        self.rang_segment = list(range(len(self.villes)))
+        self.debut = list(range(0, self.n, self.taille_segment))
+        for segment, villes_segment in enumerate(self.villes):
+            self.segment_de[villes_segment] = segment
+            self.rang[villes_segment] = np.arange(len(villes_segment))
+
+    def _parcours(self, segment: int) -> np.ndarray:
+        """Villes d'un segment dans le sens de parcours"""
+        villes_segment = self.villes[segment]
+        return villes_segment[::-1] if self.inverse[segment] else villes_segment
+
+    def _stockage(self, segment: int, villes_segment: np.ndarray) -> None:
+        """Remplacement des villes d'un segment, stockées dans le sens de parcours"""
+        self.villes[segment] = villes_segment
+        self.longueur[segment] = len(villes_segment)
+        self.inverse[segment] = False
+        self.segment_de[villes_segment] = segment
+        self.rang[villes_segment] = np.arange(len(villes_segment))
+
+    def _premiere(self, segment: int) -> int:
+        villes_segment = self.villes[segment]
+        return int(villes_segment[-1] if self.inverse[segment] else villes_segment[0])
+
+    def _derniere(self, segment: int) -> int:
+        villes_segment = self.villes[segment]
+        return int(villes_segment[0] if self.inverse[segment] else villes_segment[-1])
+
+    def _indice(self, v: int) -> int:
+        """Indice de la ville dans son segment, dans le sens de parcours"""
+        segment = self.segment_de[v]
+        if self.inverse[segment]:
+            return self.longueur[segment] - 1 - int(self.rang[v])
+        return int(self.rang[v])
+
+    def position(self, v: int) -> int:
+        return (self.debut[self.segment_de[v]] + self._indice(v)) % self.n
+
+    def suivant(self, v: int) -> int:
+        segment = self.segment_de[v]
+        rang = self.rang[v] + (-1 if self.inverse[segment] else 1)
+        if 0 <= rang < self.longueur[segment]:
+            return int(self.villes[segment][rang])
+        return self._premiere(self.ordre[(self.rang_segment[segment] + 1) % len(self.ordre)])
+
+    def precedent(self, v: int) -> int:
+        segment = self.segment_de[v]
+        rang = self.rang[v] + (1 if self.inverse[segment] else -1)
+        if 0 <= rang < self.longueur[segment]:
+            return int(self.villes[segment][rang])
+        return self._derniere(self.ordre[self.rang_segment[segment] - 1])
+
+    def _coupure(self, v: int, segment_protege: int = -1) -> None:
+        """Déplacement de villes vers un segment voisin pour que v commence un segment
+
+        On déplace la plus petite des deux parties : les villes précédant v vont à la fin
+        du segment précédent, ou les villes à partir de v au début du segment suivant.
+        La première ville de `segment_protege` ne doit pas changer.
+        """
+        segment = self.segment_de[v]
+        indice = self._indice(v)
+        if indice == 0:
+            return
+        nombre_segments = len(self.ordre)
+        rang = self.rang_segment[segment]
+        suivant = self.ordre[(rang + 1) % nombre_segments]
+        villes_segment = self._parcours(segment)
+
+        if 2*indice <= self.longueur[segment] or suivant == segment_protege:
+            precedent = self.ordre[rang - 1]
+            self._stockage(precedent, np.concatenate(
+                (self._parcours(precedent), villes_segment[:indice])))
+            self._stockage(segment, villes_segment[indice:].copy())
+            self.debut[segment] = (self.debut[segment] + indice) % self.n
+            receveur = precedent
+        else:
+            deplacees = villes_segment[indice:]
+            self._stockage(suivant, np.concatenate(
+                (deplacees, self._parcours(suivant))))
+            self._stockage(segment, villes_segment[:indice].copy())
+            self.debut[suivant] = (self.debut[suivant] - len(deplacees)) % self.n
+            receveur = suivant
+
+        # Segment devenu trop gros : on reconstruit la structure
+        if self.longueur[receveur] > 4 * self.taille_segment:
+            self._construction(self.vers_tableau())
+
+    def _dans_segment(self, a: int, b: int) -> bool:
+        """Vrai si le chemin de a à b est contenu dans un seul segment"""
+        return self.segment_de[a] == self.segment_de[b] and self._indice(a) <= self._indice(b)
+
+    def inverser(self, a: int, b: int) -> None:
+        """Inversion du chemin allant de a à b dans le sens de parcours"""
+        longueur = (self.position(b) - self.position(a)) % self.n + 1
+        # Comme pour le tableau, on inverse le côté le plus court du cycle
+        if 2*longueur > self.n:
+            a, b = self.suivant(b), self.precedent(a)
+            longueur = self.n - longueur
+        if longueur < 2:
+            return
+
+        # a doit commencer un segment et b en terminer un. Une reconstruction pendant
+        # les coupures peut défaire la première : on recommence alors
+        while not self._dans_segment(a, b) and (self._indice(a) or self._indice(self.suivant(b))):
+            self._coupure(a)
+            if not self._dans_segment(a, b):
+                self._coupure(self.suivant(b), self.segment_de[a])
+
+        if self._dans_segment(a, b):
+            # Chemin contenu dans un seul segment : inversion directe des villes
+            segment = self.segment_de[a]
+            debut, fin = sorted((int(self.rang[a]), int(self.rang[b])))
+            villes_segment = self.villes[segment]
+            villes_segment[debut:fin+1] = villes_segment[debut:fin+1][::-1].copy()
+            self.rang[villes_segment[debut:fin+1]] = np.arange(debut, fin+1)
+            return
+
+        # Inversion de l'ordre des segments de a à b et de leur sens de parcours
+        nombre_segments = len(self.ordre)
+        debut = self.rang_segment[self.segment_de[a]]
+        fin = self.rang_segment[self.segment_de[b]]
+        rangs = [(debut + k) % nombre_segments
+                 for k in range((fin - debut) % nombre_segments + 1)]
+        segments = [self.ordre[rang] for rang in rangs]
+        position = self.debut[segments[0]]
+        for rang, segment in zip(rangs, reversed(segments)):
+            self.ordre[rang] = segment
+            self.rang_segment[segment] = rang
+            self.inverse[segment] = not self.inverse[segment]
+            self.debut[segment] = position
+            position = (position + self.longueur[segment]) % self.n
+
+    def vers_tableau(self) -> np.ndarray:
+        return np.concatenate([self._parcours(segment) for segment in self.ordre])
+
+
+def creation_tour(villes: np.ndarray, structure: str = 'tableau') -> Tour:
+    """Création d'un cycle dans la représentation choisie
+
+    Parameters
+    ----------
+    villes : np.ndarray
+        villes du cycle dans l'ordre de parcours, sans répétition de la ville de départ
+    structure : str (optionnel)
+        représentation parmi `STRUCTURES`
+
+    Returns
+    -------
+    Tour
+        le cycle
+    """
+    assert structure in STRUCTURES, print(
+        "Veuillez choisir une structure parmi : {}".format(STRUCTURES))
+
+    if structure == 'tableau':
+        return TourTableau(villes)
+    return TourDeuxNiveaux(villes)